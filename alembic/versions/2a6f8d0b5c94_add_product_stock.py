@@ -0,0 +1,31 @@
+"""add product stock
+
+Revision ID: 2a6f8d0b5c94
+Revises: 9e3c5b17f4a2
+Create Date: 2026-10-18 17:31:55.067412
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2a6f8d0b5c94'
+down_revision: Union[str, Sequence[str], None] = '9e3c5b17f4a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # NULL = stock not tracked, so existing products keep selling until a quantity is set
+    op.add_column('products', sa.Column('stock', sa.Numeric(precision=12, scale=3), nullable=True))
+    op.create_check_constraint('products_stock_check', 'products', 'stock >= 0')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('products_stock_check', 'products', type_='check')
+    op.drop_column('products', 'stock')
@@ -0,0 +1,52 @@
+"""add daily sales aggregates
+
+Revision ID: 4d7a91c3e6b8
+Revises: c81f4a6d2e35
+Create Date: 2026-10-18 16:02:37.194820
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4d7a91c3e6b8'
+down_revision: Union[str, Sequence[str], None] = 'c81f4a6d2e35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+order_status = postgresql.ENUM('Pending', 'Paid', 'Shipped', 'Completed', 'Cancelled', name='orderstatus', create_type=False)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('daily_sales',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('status', order_status, nullable=False),
+    sa.Column('order_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('quantity', sa.Numeric(precision=14, scale=3), server_default=sa.text('0'), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), server_default=sa.text('0'), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'status')
+    )
+    op.create_table('daily_product_sales',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=False),
+    sa.Column('status', order_status, nullable=False),
+    sa.Column('order_count', sa.Integer(), server_default=sa.text('0'), nullable=False),
+    sa.Column('quantity', sa.Numeric(precision=14, scale=3), server_default=sa.text('0'), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), server_default=sa.text('0'), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'product_id', 'category_id', 'status')
+    )
+    op.create_index('ix_daily_product_sales_category_id_day', 'daily_product_sales', ['category_id', 'day'], unique=False)
+    # existing history is loaded with app.salesSummary.rebuild_sales (POST /analytics/rebuild)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_daily_product_sales_category_id_day', table_name='daily_product_sales')
+    op.drop_table('daily_product_sales')
+    op.drop_table('daily_sales')
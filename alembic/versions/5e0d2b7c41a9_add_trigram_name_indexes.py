@@ -0,0 +1,49 @@
+"""add trigram name indexes
+
+Revision ID: 5e0d2b7c41a9
+Revises: a0c53e1f9837
+Create Date: 2026-10-18 10:02:47.118305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e0d2b7c41a9'
+down_revision: Union[str, Sequence[str], None] = 'a0c53e1f9837'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # pg_trgm may not be shipped with the server or installable by the migration role; in that case the indexes are
+    # skipped and the API falls back to unranked ILIKE search (see app/search.py).
+    op.execute("""
+        DO $$
+        BEGIN
+            CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        EXCEPTION WHEN insufficient_privilege OR undefined_file OR feature_not_supported THEN
+            RAISE NOTICE 'pg_trgm is not available, skipping trigram indexes';
+        END
+        $$;
+    """)
+    op.execute("""
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') THEN
+                CREATE INDEX IF NOT EXISTS ix_products_name_trgm ON products USING gin (name gin_trgm_ops);
+                CREATE INDEX IF NOT EXISTS ix_categories_name_trgm ON categories USING gin (name gin_trgm_ops);
+            END IF;
+        END
+        $$;
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_categories_name_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_products_name_trgm")
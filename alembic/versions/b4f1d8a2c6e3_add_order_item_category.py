@@ -0,0 +1,45 @@
+"""add order item category
+
+Revision ID: b4f1d8a2c6e3
+Revises: 6c0e2f9a4d17
+Create Date: 2026-10-19 11:05:17.284903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4f1d8a2c6e3'
+down_revision: Union[str, Sequence[str], None] = '6c0e2f9a4d17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10000
+
+BACKFILL_CATEGORIES = (
+    "UPDATE order_items oi SET category_id = p.category_id FROM products p "
+    "WHERE p.id = oi.product_id AND oi.id > :start AND oi.id <= :end AND oi.category_id IS NULL"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # the product's category when the item was written, so the sales aggregates add and remove an
+    # order on the same row even if the product moves to another category in between. Nullable:
+    # items written by the previous release during the deploy fall back to the product's category.
+    op.add_column('order_items', sa.Column('category_id', sa.Integer(), nullable=True))
+
+    # existing items take the current category, which is what daily_product_sales was built from
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        last_id = bind.execute(sa.text("SELECT coalesce(max(id), 0) FROM order_items")).scalar()
+        for start in range(0, last_id, BATCH_SIZE):
+            bind.execute(sa.text(BACKFILL_CATEGORIES), {"start": start, "end": start + BATCH_SIZE})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('order_items', 'category_id')
@@ -0,0 +1,34 @@
+"""add unique product name
+
+Revision ID: c81f4a6d2e35
+Revises: 7b2e5d9c0a13
+Create Date: 2026-10-18 15:20:41.512093
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c81f4a6d2e35'
+down_revision: Union[str, Sequence[str], None] = '7b2e5d9c0a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # the catalogue import upserts on the product name, which needs a unique arbiter
+    duplicates = op.get_bind().execute(sa.text(
+        "SELECT name FROM products GROUP BY name HAVING count(*) > 1 LIMIT 10"
+    )).scalars().all()
+    if duplicates:
+        raise RuntimeError(f"Duplicate product names must be merged before upgrading: {', '.join(duplicates)}")
+    op.create_unique_constraint('products_name_key', 'products', ['name'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('products_name_key', 'products', type_='unique')
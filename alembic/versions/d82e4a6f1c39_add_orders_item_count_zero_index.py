@@ -0,0 +1,30 @@
+"""add orders item count zero index
+
+Revision ID: d82e4a6f1c39
+Revises: b4f1d8a2c6e3
+Create Date: 2026-10-19 12:40:03.517762
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd82e4a6f1c39'
+down_revision: Union[str, Sequence[str], None] = 'b4f1d8a2c6e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # only orders still missing their totals (and empty orders): lets the periodic
+    # recompute_order_totals check find them without scanning orders
+    op.create_index('ix_orders_item_count_zero', 'orders', ['id'], unique=False, postgresql_where=sa.text('item_count = 0'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_orders_item_count_zero', table_name='orders', postgresql_where=sa.text('item_count = 0'))
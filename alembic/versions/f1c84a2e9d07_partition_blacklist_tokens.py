@@ -0,0 +1,105 @@
+"""partition blacklist_tokens by expires_at
+
+Revision ID: f1c84a2e9d07
+Revises: e3a9f60d1b52
+Create Date: 2026-10-18 13:21:54.670241
+
+Opt-in for high-volume deployments: run with `alembic -x partition_blacklist=true upgrade head`
+and set BLACKLIST_PARTITIONED=true so the maintenance task drops expired monthly partitions
+instead of deleting rows. Without the flag this revision is a no-op.
+
+"""
+from typing import Sequence, Union
+
+from alembic import op, context
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c84a2e9d07'
+down_revision: Union[str, Sequence[str], None] = 'e3a9f60d1b52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _enabled() -> bool:
+    return context.get_x_argument(as_dictionary=True).get("partition_blacklist", "").lower() in ("1", "true", "yes")
+
+
+def _is_partitioned() -> bool:
+    return bool(op.get_bind().execute(sa.text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = 'blacklist_tokens')"
+    )).scalar())
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not _enabled() or _is_partitioned():
+        return
+    op.execute("ALTER TABLE blacklist_tokens RENAME TO blacklist_tokens_legacy")
+    op.execute("ALTER INDEX blacklist_tokens_pkey RENAME TO blacklist_tokens_legacy_pkey")
+    op.execute("ALTER INDEX blacklist_tokens_token_hash_key RENAME TO blacklist_tokens_legacy_token_hash_key")
+    op.execute("ALTER TABLE blacklist_tokens_legacy RENAME CONSTRAINT blacklist_tokens_session_id_fkey TO blacklist_tokens_legacy_session_id_fkey")
+    op.execute("ALTER SEQUENCE blacklist_tokens_id_seq OWNED BY NONE")
+    op.execute("""
+        CREATE TABLE blacklist_tokens (
+            id INTEGER NOT NULL DEFAULT nextval('blacklist_tokens_id_seq'),
+            token_hash VARCHAR NOT NULL,
+            expires_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            session_id INTEGER REFERENCES sessions (id) ON DELETE CASCADE,
+            CONSTRAINT blacklist_tokens_pkey PRIMARY KEY (id, expires_at),
+            CONSTRAINT blacklist_tokens_token_hash_key UNIQUE (token_hash, expires_at)
+        ) PARTITION BY RANGE (expires_at)
+    """)
+    op.execute("ALTER SEQUENCE blacklist_tokens_id_seq OWNED BY blacklist_tokens.id")
+    op.execute("CREATE INDEX ix_blacklist_tokens_token_hash ON blacklist_tokens (token_hash)")
+    op.execute("""
+        DO $$
+        DECLARE
+            month_start DATE := date_trunc('month', now())::date;
+            last_month DATE := (date_trunc('month', greatest((SELECT max(expires_at) FROM blacklist_tokens_legacy), now())) + interval '2 months')::date;
+        BEGIN
+            WHILE month_start <= last_month LOOP
+                EXECUTE format(
+                    'CREATE TABLE blacklist_tokens_%s PARTITION OF blacklist_tokens FOR VALUES FROM (%L) TO (%L)',
+                    to_char(month_start, 'YYYY_MM'), month_start, (month_start + interval '1 month')::date
+                );
+                month_start := (month_start + interval '1 month')::date;
+            END LOOP;
+        END
+        $$;
+    """)
+    op.execute("CREATE TABLE blacklist_tokens_default PARTITION OF blacklist_tokens DEFAULT")
+    op.execute("""
+        INSERT INTO blacklist_tokens (id, token_hash, expires_at, created_at, session_id)
+        SELECT id, token_hash, expires_at, created_at, session_id FROM blacklist_tokens_legacy WHERE expires_at >= now()
+    """)
+    op.execute("DROP TABLE blacklist_tokens_legacy")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if not _is_partitioned():
+        return
+    op.execute("ALTER TABLE blacklist_tokens RENAME TO blacklist_tokens_partitioned")
+    op.execute("ALTER INDEX blacklist_tokens_pkey RENAME TO blacklist_tokens_partitioned_pkey")
+    op.execute("ALTER INDEX blacklist_tokens_token_hash_key RENAME TO blacklist_tokens_partitioned_token_hash_key")
+    op.execute("ALTER SEQUENCE blacklist_tokens_id_seq OWNED BY NONE")
+    op.create_table('blacklist_tokens',
+    sa.Column('id', sa.Integer(), server_default=sa.text("nextval('blacklist_tokens_id_seq')"), nullable=False),
+    sa.Column('token_hash', sa.String(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('session_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['session_id'], ['sessions.id'], name='blacklist_tokens_session_id_fkey', ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', name='blacklist_tokens_pkey'),
+    sa.UniqueConstraint('token_hash', name='blacklist_tokens_token_hash_key')
+    )
+    op.execute("ALTER SEQUENCE blacklist_tokens_id_seq OWNED BY blacklist_tokens.id")
+    op.execute("""
+        INSERT INTO blacklist_tokens (id, token_hash, expires_at, created_at, session_id)
+        SELECT DISTINCT ON (token_hash) id, token_hash, expires_at, created_at, session_id
+        FROM blacklist_tokens_partitioned ORDER BY token_hash, expires_at DESC
+    """)
+    op.execute("DROP TABLE blacklist_tokens_partitioned CASCADE")
@@ -0,0 +1,31 @@
+"""add order item reserved quantity
+
+Revision ID: f3c7a1e95b28
+Revises: d82e4a6f1c39
+Create Date: 2026-10-19 14:22:41.806125
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3c7a1e95b28'
+down_revision: Union[str, Sequence[str], None] = 'd82e4a6f1c39'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # what each item took from products.stock; cancelling or deleting the order gives back exactly
+    # this. Existing items start at 0: whether they reserved anything (the product may have been
+    # untracked when they were placed) is unknown, so they never give stock back.
+    op.add_column('order_items', sa.Column('reserved_quantity', sa.Numeric(precision=10, scale=3), server_default=sa.text('0'), nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('order_items', 'reserved_quantity')
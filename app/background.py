@@ -0,0 +1,70 @@
+import asyncio
+from typing import Callable, List, Optional
+from starlette.concurrency import run_in_threadpool
+
+_tasks: List[asyncio.Task] = []
+_shutdown_hooks: List[Callable] = []
+
+
+class Wakeup:
+    # lets any thread cut a periodic task's sleep short without running the task itself
+    def __init__(self):
+        self._loop = None
+        self._event = None
+
+    def bind(self):
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+
+    def set(self):
+        if self._loop is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._event.set)
+        except RuntimeError:
+            pass
+
+    async def wait(self, timeout: float):
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._event.clear()
+
+
+async def _run_periodic(interval: float, func: Callable, wakeup: Optional[Wakeup]):
+    while True:
+        if wakeup:
+            await wakeup.wait(interval)
+        else:
+            await asyncio.sleep(interval)
+        try:
+            await run_in_threadpool(func)
+        except Exception as e:
+            pass
+
+
+def start_periodic(interval: float, func: Callable, flush_on_shutdown: bool = True, wakeup: Optional[Wakeup] = None):
+    if wakeup:
+        wakeup.bind()
+    _tasks.append(asyncio.create_task(_run_periodic(interval, func, wakeup)))
+    if flush_on_shutdown:
+        _shutdown_hooks.append(func)
+
+
+def start(coroutine):
+    # long-running task that manages its own loop; cancelled on shutdown
+    _tasks.append(asyncio.create_task(coroutine))
+
+
+async def stop_all():
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
+    for hook in _shutdown_hooks:
+        try:
+            await run_in_threadpool(hook)
+        except Exception as e:
+            pass
+    _shutdown_hooks.clear()
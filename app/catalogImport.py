@@ -0,0 +1,126 @@
+from decimal import Decimal
+from typing import BinaryIO, Dict, Iterator, Tuple
+from pydantic import ValidationError
+from sqlalchemy import select, literal_column
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session as DbSession
+from app.config import settings
+from app.models import Category, Product
+from app.routers.error import classify_error
+from app.httpCache import bump_version
+from app.schemas import ProductImportRow, ProductImportError, ProductImportOut
+import codecs
+import csv
+import json
+
+FORMATS = ("csv", "ndjson")
+
+
+def detect_format(filename: str, content_type: str) -> str:
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or "ndjson" in (content_type or ""):
+        return "ndjson"
+    return "csv"
+
+
+def iter_records(file: BinaryIO, format: str) -> Iterator[Tuple[int, dict]]:
+    # decodes the upload line by line, nothing is read ahead beyond the current record
+    lines = codecs.iterdecode(file, "utf-8-sig")
+    if format == "ndjson":
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            yield line_number, record if isinstance(record, dict) else None
+        return
+    reader = csv.DictReader(lines)
+    for record in reader:
+        yield reader.line_num, {key.strip(): value for key, value in record.items() if key}
+
+
+def _validation_message(e: ValidationError) -> str:
+    error = e.errors()[0]
+    location = ".".join(str(part) for part in error["loc"])
+    return f"{location}: {error['msg']}" if location else error["msg"]
+
+
+class ProductImporter:
+    def __init__(self, db: DbSession):
+        self.db = db
+        self.categories = self._load_categories()
+        self.category_ids = set(self.categories.values())
+        self.batch: Dict[str, Tuple[int, dict]] = {}
+        self.result = ProductImportOut()
+
+    def _load_categories(self) -> Dict[str, int]:
+        return {name.strip().lower(): id for id, name in self.db.execute(select(Category.id, Category.name))}
+
+    def fail(self, line: int, message: str):
+        self.result.failed += 1
+        if len(self.result.errors) < settings.import_max_errors:
+            self.result.errors.append(ProductImportError(line=line, message=message))
+        else:
+            self.result.errors_truncated = True
+
+    def _resolve_category(self, row: ProductImportRow):
+        if row.category:
+            return self.categories.get(row.category.strip().lower())
+        if row.category_id in self.category_ids:
+            return row.category_id
+        return None
+
+    def add(self, line: int, record):
+        if record is None:
+            return self.fail(line, "Malformed record")
+        try:
+            row = ProductImportRow.model_validate({key: value for key, value in record.items() if value not in ("", None)})
+        except ValidationError as e:
+            return self.fail(line, _validation_message(e))
+        name = row.name.strip()
+        if not name:
+            return self.fail(line, "name: Field required")
+        if not row.unit_price.is_finite() or row.unit_price < 0:
+            return self.fail(line, "unit_price: must be a positive number")
+        category_id = self._resolve_category(row)
+        if category_id is None:
+            return self.fail(line, "Category not found")
+        # ON CONFLICT cannot touch the same row twice in one statement: a later line for the same name wins
+        self.batch[name] = (line, {"name": name, "unit_price": row.unit_price.quantize(Decimal("0.01")), "category_id": category_id})
+        if len(self.batch) >= settings.import_batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.batch:
+            return
+        lines, rows = zip(*self.batch.values())
+        self.batch = {}
+        statement = insert(Product).values(list(rows))
+        statement = statement.on_conflict_do_update(
+            index_elements=[Product.name],
+            set_={"unit_price": statement.excluded.unit_price, "category_id": statement.excluded.category_id},
+        ).returning(literal_column("xmax = 0"))
+        try:
+            inserted = sum(1 for created in self.db.scalars(statement) if created)
+            bump_version(self.db, "products")
+            self.db.commit()
+        except Exception as e:
+            self.db.rollback()
+            message = classify_error(e).message
+            for line in lines:
+                self.fail(line, message)
+            return
+        self.result.inserted += inserted
+        self.result.updated += len(rows) - inserted
+
+    def run(self, records: Iterator[Tuple[int, dict]]) -> ProductImportOut:
+        for line, record in records:
+            self.add(line, record)
+        self.flush()
+        return self.result
+
+
+def import_products(db: DbSession, file: BinaryIO, format: str) -> ProductImportOut:
+    return ProductImporter(db).run(iter_records(file, format))
@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -15,9 +16,62 @@ class Settings(BaseSettings):
     mail_from: str
     mail_server: str
     mail_port:int
+    mail_starttls: bool = True
+    mail_use_credentials: bool = True
+    mail_timeout_sec: int = 10
+    mail_batch_size: int = 50
+    mail_max_attempts: int = 5
+    mail_retry_base_sec: int = 30
+    outbox_poll_interval_sec: int = 5
     cloud_name: str
     api_key: str
     api_secret: str
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: int = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    count_cache_ttl_sec: int = 30
+    estimated_counts: bool = False
+    geoip_backend: Optional[str] = None
+    geoip_database_path: Optional[str] = None
+    geoip_timeout_sec: float = 2
+    geoip_cache_size: int = 10000
+    geoip_cache_ttl_sec: int = 86400
+    bcrypt_rounds: int = 12
+    password_pool_size: int = 2
+    password_pool_max_pending: int = 64
+    jwt_backend: str = "jose"
+    token_cache_size: int = 10000
+    token_cache_ttl_sec: int = 300
+    revocation_backend: str = "memory"
+    redis_url: Optional[str] = None
+    revocation_bloom_capacity: int = 100000
+    revocation_bloom_error_rate: float = 0.01
+    revocation_evict_interval_sec: int = 600
+    token_purge_interval_sec: int = 3600
+    token_purge_batch_size: int = 5000
+    order_totals_interval_sec: int = 300
+    blacklist_partitioned: bool = False
+    error_sink_max_pending: int = 1000
+    error_sink_flush_size: int = 200
+    error_sink_flush_interval_sec: int = 5
+    storage_backend: str = "cloudinary"
+    local_storage_path: str = "media"
+    local_storage_url: str = "/media"
+    image_workers: int = 2
+    image_quality: int = 82
+    response_cache_ttl_sec: int = 60
+    response_cache_size: int = 2000
+    cache_versions_check_sec: int = 5
+    import_batch_size: int = 2000
+    import_max_errors: int = 500
+    export_fetch_size: int = 5000
+    export_chunk_bytes: int = 65536
+    analytics_timezone: str = "UTC"
+    analytics_rebuild_max_days: int = 366
+    principal_cache_ttl_sec: int = 60
+    activity_flush_interval_sec: int = 30
 
     class Config:
         env_file = ".env"
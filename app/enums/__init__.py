@@ -1,3 +1,7 @@
 from .accountStatus import AccountStatus
 from .orderStatus import OrderStatus
-from .role import Role
\ No newline at end of file
+from .role import Role
+from .paginationMode import PaginationMode
+from .searchMode import SearchMode
+from .emailStatus import EmailStatus
+from .orderSort import OrderSort
\ No newline at end of file
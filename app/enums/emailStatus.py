@@ -0,0 +1,6 @@
+from enum import Enum
+
+class EmailStatus(Enum):
+    Pending="Pending"
+    Sent="Sent"
+    Failed="Failed"
@@ -0,0 +1,5 @@
+from enum import Enum
+
+class OrderSort(Enum):
+    CreatedOn="CreatedOn"
+    TotalAmount="TotalAmount"
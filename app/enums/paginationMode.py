@@ -0,0 +1,5 @@
+from enum import Enum
+
+class PaginationMode(Enum):
+    Page="Page"
+    Cursor="Cursor"
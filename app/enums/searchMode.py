@@ -0,0 +1,5 @@
+from enum import Enum
+
+class SearchMode(Enum):
+    Substring="Substring"
+    Similarity="Similarity"
@@ -0,0 +1,162 @@
+from bisect import bisect_right
+from ipaddress import ip_address, ip_network
+from typing import Optional
+from sqlalchemy import update
+from app.cache import TTLCache
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Session
+import csv
+import json
+import requests
+
+
+class GeoIPResolver:
+    def lookup(self, ip: str) -> Optional[dict]:
+        raise NotImplementedError
+
+
+class NullResolver(GeoIPResolver):
+    def lookup(self, ip: str) -> Optional[dict]:
+        return None
+
+
+class MMDBResolver(GeoIPResolver):
+    def __init__(self, path: str):
+        import maxminddb
+        self.reader = maxminddb.open_database(path)
+
+    def lookup(self, ip: str) -> Optional[dict]:
+        record = self.reader.get(ip)
+        if not record:
+            return None
+        subdivisions = record.get("subdivisions") or [{}]
+        location = record.get("location") or {}
+        return {
+            "country": (record.get("country") or {}).get("names", {}).get("en"),
+            "region": subdivisions[0].get("names", {}).get("en"),
+            "city": (record.get("city") or {}).get("names", {}).get("en"),
+            "lat": location.get("latitude"),
+            "lon": location.get("longitude"),
+        }
+
+
+class CSVRangeResolver(GeoIPResolver):
+    # expects rows of: start_ip,end_ip,country,region,city,lat,lon (non-overlapping ranges)
+    def __init__(self, path: str):
+        ranges = []
+        with open(path, newline="", encoding="utf-8") as file:
+            for row in csv.reader(file):
+                if not row or row[0].startswith("#") or row[0] == "start_ip":
+                    continue
+                start, end, country, region, city, lat, lon = row[:7]
+                ranges.append((int(ip_address(start)), int(ip_address(end)), {
+                    "country": country or None,
+                    "region": region or None,
+                    "city": city or None,
+                    "lat": float(lat) if lat else None,
+                    "lon": float(lon) if lon else None,
+                }))
+        ranges.sort(key=lambda r: r[0])
+        self.starts = [r[0] for r in ranges]
+        self.ranges = ranges
+
+    def lookup(self, ip: str) -> Optional[dict]:
+        value = int(ip_address(ip))
+        index = bisect_right(self.starts, value) - 1
+        if index < 0:
+            return None
+        start, end, location = self.ranges[index]
+        return location if start <= value <= end else None
+
+
+class HttpResolver(GeoIPResolver):
+    def __init__(self):
+        self.http = requests.Session()
+
+    def lookup(self, ip: str) -> Optional[dict]:
+        response = self.http.get(f"http://ip-api.com/json/{ip}", timeout=settings.geoip_timeout_sec)
+        data = response.json()
+        if data.get("status") != "success":
+            return None
+        return {
+            "country": data.get("country"),
+            "region": data.get("regionName"),
+            "city": data.get("city"),
+            "lat": data.get("lat"),
+            "lon": data.get("lon"),
+        }
+
+
+class CachedResolver(GeoIPResolver):
+    def __init__(self, resolver: GeoIPResolver):
+        self.resolver = resolver
+        self.cache = TTLCache(ttl=settings.geoip_cache_ttl_sec, maxsize=settings.geoip_cache_size)
+
+    @staticmethod
+    def cache_key(ip: str) -> str:
+        address = ip_address(ip)
+        prefix = 24 if address.version == 4 else 48
+        return str(ip_network(f"{address}/{prefix}", strict=False))
+
+    def lookup(self, ip: str) -> Optional[dict]:
+        key = self.cache_key(ip)
+        location = self.cache.get(key, False)
+        if location is False:
+            location = self.resolver.lookup(ip)
+            self.cache.set(key, location)
+        return location
+
+
+def default_backend() -> str:
+    # offline unless the HTTP resolver is asked for explicitly
+    path = settings.geoip_database_path
+    if not path:
+        return "none"
+    return "mmdb" if path.lower().endswith(".mmdb") else "csv"
+
+
+def build_resolver() -> GeoIPResolver:
+    backend = settings.geoip_backend or default_backend()
+    if backend == "mmdb":
+        resolver = MMDBResolver(settings.geoip_database_path)
+    elif backend == "csv":
+        resolver = CSVRangeResolver(settings.geoip_database_path)
+    elif backend == "http":
+        resolver = HttpResolver()
+    else:
+        return NullResolver()
+    return CachedResolver(resolver)
+
+
+_resolver = None
+
+
+def get_resolver() -> GeoIPResolver:
+    global _resolver
+    if _resolver is None:
+        _resolver = build_resolver()
+    return _resolver
+
+
+def get_location_from_ip(ip: Optional[str]) -> Optional[dict]:
+    try:
+        if not ip or not ip_address(ip).is_global:
+            return None
+        return get_resolver().lookup(ip)
+    except Exception as e:
+        return None
+
+
+def enrich_session_location(session_id: int, ip: Optional[str]):
+    location = get_location_from_ip(ip)
+    if not location:
+        return
+    db = SessionLocal()
+    try:
+        db.execute(update(Session).where(Session.id == session_id).values(location=json.dumps(location)))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+    finally:
+        db.close()
@@ -0,0 +1,149 @@
+from functools import cached_property
+from typing import Dict, Iterable, Optional, Sequence, Tuple, Union
+from fastapi import Request, Response
+from pydantic import BaseModel
+from sqlalchemy import select, func, cast, String
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session as DbSession
+from app.cache import TTLCache
+from app.config import settings
+from app.database import SQLALCHEMY_DATABASE_URL
+from app.models import CacheVersion
+from app.serialization import json_response
+import asyncio
+import hashlib
+import json
+
+# Table versions live in cache_versions and are bumped in the same transaction as the write.
+# The bump also NOTIFYs the new version (delivered on commit), so each worker keeps a copy in
+# memory and answers conditional GETs without touching the database. While the worker is not
+# listening (startup, lost connection) the versions are read from the table instead.
+
+VERSIONS_CHANNEL = "cache_versions"
+
+response_cache = TTLCache(ttl=settings.response_cache_ttl_sec, maxsize=settings.response_cache_size)
+
+
+class TableVersions:
+    def __init__(self):
+        self._versions: Dict[str, int] = {}
+        self.live = False
+
+    def load(self, rows: Iterable[Tuple[str, int]]):
+        self._versions = dict(rows)
+
+    def update(self, name: str, version: int):
+        # notifications of concurrent commits may arrive out of order: keep the highest
+        if version > self._versions.get(name, 0):
+            self._versions[name] = version
+
+    def get(self, tables: Sequence[str]) -> Optional[Dict[str, int]]:
+        if not self.live:
+            return None
+        return {table: self._versions[table] for table in tables if table in self._versions}
+
+
+table_versions = TableVersions()
+
+
+def bump_version(db: DbSession, *tables: str):
+    # call right before the commit: the row lock on the version is then held as briefly as possible
+    rows = [{"name": table, "version": 1} for table in sorted(set(tables))]
+    statement = insert(CacheVersion).values(rows)
+    bumped = statement.on_conflict_do_update(
+        index_elements=[CacheVersion.name],
+        set_={"version": CacheVersion.version + 1},
+    ).returning(CacheVersion.name, CacheVersion.version).cte("bumped")
+    db.execute(select(func.pg_notify(VERSIONS_CHANNEL, bumped.c.name + ":" + cast(bumped.c.version, String))))
+
+
+def _versions_query(tables: Sequence[str]):
+    return select(CacheVersion.name, CacheVersion.version).where(CacheVersion.name.in_(tables))
+
+
+def load_versions(db: DbSession, tables: Sequence[str]) -> Dict[str, int]:
+    versions = table_versions.get(tables)
+    if versions is None:
+        versions = dict(db.execute(_versions_query(tables)).all())
+    return versions
+
+
+async def load_versions_async(db: AsyncSession, tables: Sequence[str]) -> Dict[str, int]:
+    versions = table_versions.get(tables)
+    if versions is None:
+        versions = dict((await db.execute(_versions_query(tables))).all())
+    return versions
+
+
+def _on_version(connection, pid, channel, payload: str):
+    name, _, version = payload.rpartition(":")
+    table_versions.update(name, int(version))
+
+
+async def listen_for_versions():
+    # one dedicated connection per worker, outside the pools; reconnects after any failure
+    import asyncpg
+    while True:
+        connection = None
+        try:
+            connection = await asyncpg.connect(SQLALCHEMY_DATABASE_URL)
+            lost = asyncio.Event()
+            connection.add_termination_listener(lambda _: lost.set())
+            await connection.add_listener(VERSIONS_CHANNEL, _on_version)
+            # read after LISTEN, so no bump can fall between the two
+            table_versions.load(await connection.fetch("SELECT name, version FROM cache_versions"))
+            table_versions.live = True
+            while not lost.is_set():
+                try:
+                    await asyncio.wait_for(lost.wait(), settings.cache_versions_check_sec)
+                except asyncio.TimeoutError:
+                    await connection.fetchval("SELECT 1")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            pass
+        finally:
+            table_versions.live = False
+            if connection is not None and not connection.is_closed():
+                connection.terminate()
+        await asyncio.sleep(settings.cache_versions_check_sec)
+
+
+def _normalize(filter: Optional[BaseModel]) -> str:
+    if filter is None:
+        return ""
+    return json.dumps(filter.model_dump(mode="json", exclude_defaults=True), sort_keys=True, separators=(",", ":"))
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+class CachedView:
+    def __init__(self, request: Request, route: str, versions: Dict[str, int], filter: Optional[BaseModel] = None):
+        versions = ",".join(f"{table}:{version}" for table, version in sorted(versions.items()))
+        self.key = f"{route}|{_normalize(filter)}|{versions}"
+        self.etag = '"' + hashlib.sha256(self.key.encode()).hexdigest()[:32] + '"'
+        self.if_none_match = request.headers.get("if-none-match")
+
+    @property
+    def headers(self) -> dict:
+        return {"ETag": self.etag, "Cache-Control": "private, no-cache"}
+
+    @cached_property
+    def hit(self) -> Optional[Response]:
+        if _matches(self.if_none_match, self.etag):
+            return Response(status_code=304, headers=self.headers)
+        body = response_cache.get(self.key)
+        if body is not None:
+            return json_response(body, self.headers)
+        return None
+
+    def store(self, payload: Union[BaseModel, bytes]) -> Response:
+        body = payload if isinstance(payload, bytes) else payload.model_dump_json().encode()
+        response_cache.set(self.key, body)
+        return json_response(body, self.headers)
@@ -0,0 +1,147 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+from fastapi import UploadFile
+from sqlalchemy import update
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Category
+from app.httpCache import bump_version
+import cloudinary.uploader
+import os
+import shutil
+import tempfile
+import uuid
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+RENDITIONS = {"thumb": 200, "medium": 800, "large": 1600}
+PRIMARY_RENDITION = "medium"
+
+
+class StorageBackend:
+    def upload(self, path: str, key: str) -> str:
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+
+class CloudinaryStorage(StorageBackend):
+    def upload(self, path: str, key: str) -> str:
+        return cloudinary.uploader.upload(path, public_id=key, overwrite=True).get("secure_url")
+
+    def delete(self, key: str):
+        cloudinary.uploader.destroy(key)
+
+
+class LocalStorage(StorageBackend):
+    def __init__(self, root: str, base_url: str):
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+
+    def upload(self, path: str, key: str) -> str:
+        target = self.root / f"{key}{Path(path).suffix}"
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(path, target)
+        return f"{self.base_url}/{target.relative_to(self.root).as_posix()}"
+
+    def delete(self, key: str):
+        target = self.root / key
+        for file in target.parent.glob(f"{target.name}.*"):
+            file.unlink(missing_ok=True)
+
+
+def build_storage() -> StorageBackend:
+    if settings.storage_backend == "local":
+        return LocalStorage(settings.local_storage_path, settings.local_storage_url)
+    return CloudinaryStorage()
+
+
+def spool_upload(upload: UploadFile) -> str:
+    suffix = Path(upload.filename or "").suffix or ".img"
+    upload.file.seek(0)
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as spooled:
+        shutil.copyfileobj(upload.file, spooled, 1024 * 1024)
+        return spooled.name
+
+
+def render_renditions(path: str) -> Dict[str, str]:
+    if Image is None:
+        return {PRIMARY_RENDITION: path}
+    renditions = {}
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image).convert("RGB")
+        for name, size in RENDITIONS.items():
+            rendition = image.copy()
+            rendition.thumbnail((size, size))
+            fd, rendition_path = tempfile.mkstemp(suffix=".jpg")
+            with os.fdopen(fd, "wb") as file:
+                rendition.save(file, "JPEG", quality=settings.image_quality, optimize=True, progressive=True)
+            renditions[name] = rendition_path
+    return renditions
+
+
+class ImagePipeline:
+    def __init__(self):
+        self.storage = build_storage()
+        self.executor = ThreadPoolExecutor(max_workers=settings.image_workers, thread_name_prefix="images")
+
+    @staticmethod
+    def new_public_id(folder: str) -> str:
+        return f"{folder}/{uuid.uuid4().hex}"
+
+    def submit_category_image(self, category_id: int, spooled_path: str, public_id: str, previous_public_id: Optional[str] = None):
+        self.executor.submit(self._process_category_image, category_id, spooled_path, public_id, previous_public_id)
+
+    def _process_category_image(self, category_id: int, spooled_path: str, public_id: str, previous_public_id: Optional[str]):
+        renditions = {}
+        try:
+            renditions = render_renditions(spooled_path)
+            links = {name: self.storage.upload(path, f"{public_id}_{name}") for name, path in renditions.items()}
+            db = SessionLocal()
+            try:
+                # only publish if the category still points at this upload (not deleted or replaced meanwhile)
+                updated = db.execute(
+                    update(Category)
+                    .where(Category.id == category_id, Category.public_id == public_id)
+                    .values(image_link=links.get(PRIMARY_RENDITION) or next(iter(links.values())))
+                ).rowcount
+                if updated:
+                    bump_version(db, "categories")
+                db.commit()
+            finally:
+                db.close()
+            if updated:
+                if previous_public_id:
+                    self._delete(previous_public_id)
+            else:
+                self._delete(public_id)
+        except Exception as e:
+            pass
+        finally:
+            for path in {spooled_path, *renditions.values()}:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+    def queue_delete(self, public_id: Optional[str]):
+        if public_id:
+            self.executor.submit(self._delete, public_id)
+
+    def _delete(self, public_id: str):
+        for key in [public_id, *(f"{public_id}_{name}" for name in RENDITIONS)]:
+            try:
+                self.storage.delete(key)
+            except Exception as e:
+                pass
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+image_pipeline = ImagePipeline()
@@ -0,0 +1,70 @@
+from jose import JWTError, ExpiredSignatureError, jwt
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+HMAC_DIGESTS = {"HS256": hashlib.sha256, "HS384": hashlib.sha384, "HS512": hashlib.sha512}
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+class JoseCodec:
+    def __init__(self, secret_key: str, algorithm: str):
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+
+    def encode(self, claims: dict) -> str:
+        return jwt.encode(claims, self.secret_key, self.algorithm)
+
+    def decode(self, token: str) -> dict:
+        return jwt.decode(token, self.secret_key, self.algorithm)
+
+
+class HmacCodec:
+    # HS256/384/512 only: the keyed HMAC state and the header segment are built once
+    def __init__(self, secret_key: str, algorithm: str):
+        self.algorithm = algorithm
+        self._mac = hmac.new(secret_key.encode(), digestmod=HMAC_DIGESTS[algorithm])
+        self._header = _b64encode(json.dumps({"alg": algorithm, "typ": "JWT"}, separators=(",", ":")).encode())
+
+    def _sign(self, signing_input: bytes) -> bytes:
+        mac = self._mac.copy()
+        mac.update(signing_input)
+        return _b64encode(mac.digest())
+
+    def encode(self, claims: dict) -> str:
+        signing_input = self._header + b"." + _b64encode(json.dumps(claims, separators=(",", ":")).encode())
+        return (signing_input + b"." + self._sign(signing_input)).decode()
+
+    def decode(self, token: str) -> dict:
+        try:
+            raw = token.encode()
+            signing_input, signature = raw.rsplit(b".", 1)
+            header, payload = signing_input.split(b".")
+            if json.loads(_b64decode(header)).get("alg") != self.algorithm:
+                raise JWTError("The specified alg value is not allowed")
+            claims = json.loads(_b64decode(payload))
+        except JWTError:
+            raise
+        except Exception as e:
+            raise JWTError("Invalid token")
+        if not hmac.compare_digest(self._sign(signing_input), signature):
+            raise JWTError("Signature verification failed.")
+        exp = claims.get("exp")
+        if exp is not None and float(exp) < time.time():
+            raise ExpiredSignatureError("Signature has expired.")
+        return claims
+
+
+def build_codec(secret_key: str, algorithm: str, backend: str):
+    if backend == "hmac" and algorithm in HMAC_DIGESTS:
+        return HmacCodec(secret_key, algorithm)
+    return JoseCodec(secret_key, algorithm)
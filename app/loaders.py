@@ -0,0 +1,94 @@
+from functools import lru_cache
+from typing import Union, get_args, get_origin
+from pydantic import BaseModel
+from sqlalchemy import inspect, select
+from sqlalchemy.orm import aliased, joinedload, selectinload
+
+
+def _nested_schema(annotation):
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation
+    for arg in get_args(annotation):
+        schema = _nested_schema(arg)
+        if schema:
+            return schema
+    return None
+
+
+def _build_options(model, schema, seen):
+    schema.model_rebuild()
+    relationships = inspect(model).relationships
+    options = []
+    for name, field in schema.model_fields.items():
+        relationship = relationships.get(name)
+        nested = _nested_schema(field.annotation)
+        if relationship is None or nested is None or nested in seen:
+            continue
+        attribute = getattr(model, name)
+        # many-to-one rides along in the parent row, collections get one IN query per level
+        loader = selectinload(attribute) if relationship.uselist else joinedload(attribute)
+        children = _build_options(relationship.mapper.class_, nested, seen | {nested})
+        options.append(loader.options(*children) if children else loader)
+    return options
+
+
+@lru_cache(maxsize=None)
+def _cached_options(model, schema):
+    return tuple(_build_options(model, schema, frozenset({schema})))
+
+
+def loader_options(model, schema) -> list:
+    return list(_cached_options(model, schema))
+
+
+def _build_projection(entity, schema, prefix, seen):
+    schema.model_rebuild()
+    mapper = inspect(entity).mapper
+    columns, joins = [], []
+    for name, field in schema.model_fields.items():
+        if name in mapper.column_attrs:
+            columns.append(getattr(entity, name).label(prefix + name))
+            continue
+        relationship = mapper.relationships.get(name)
+        nested = _nested_schema(field.annotation)
+        if relationship is None or nested is None:
+            if field.is_required():
+                return None
+            continue
+        # collections would multiply the parent rows, those schemas keep the ORM path
+        if relationship.uselist or nested in seen:
+            return None
+        target = aliased(relationship.mapper.class_)
+        nullable = any(column.nullable for column in relationship.local_columns)
+        joins.append((getattr(entity, name).of_type(target), nullable))
+        child = _build_projection(target, nested, f"{prefix}{name}__", seen | {nested})
+        if child is None:
+            return None
+        columns.extend(child[0])
+        joins.extend(child[1])
+    return columns, joins
+
+
+@lru_cache(maxsize=None)
+def projected_select(model, schema):
+    # a flat SELECT of just the columns the schema reads, or None when it needs collections;
+    # nested many-to-one fields come back labelled "relation__column" (see nest_row)
+    projection = _build_projection(model, schema, "", frozenset({schema}))
+    if projection is None:
+        return None
+    columns, joins = projection
+    query = select(*columns).select_from(model)
+    for target, nullable in joins:
+        query = query.outerjoin(target) if nullable else query.join(target)
+    return query
+
+
+def nest_row(row) -> dict:
+    result = {}
+    for label, value in row._mapping.items():
+        *path, name = label.split("__")
+        target = result
+        for part in path:
+            target = target.setdefault(part, {})
+        target[name] = value
+    return result
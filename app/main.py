@@ -1,8 +1,20 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
 import cloudinary
 from app.config import settings
-from app.routers import user, category, auth, product, refreshToken, order
+from app.routers import user, category, auth, product, refreshToken, order, internal, analytics
+from app.routers.session import activity_tracker
+from app import background
+from app.database import async_engine
+from app.outbox import outbox_worker, preload_templates
+from app.passwords import password_pool
+from app.revocation import revocation_index, load_revocation_index
+from app.maintenance import purge_expired_tokens, recompute_order_totals
+from app.routers.error import error_sink, RouteContextMiddleware
+from app.images import image_pipeline
+from app.httpCache import listen_for_versions
+from starlette.concurrency import run_in_threadpool
 
 
 
@@ -14,6 +26,8 @@ app.include_router(category.router)
 app.include_router(product.router)
 app.include_router(refreshToken.router) 
 app.include_router(order.router)
+app.include_router(internal.router)
+app.include_router(analytics.router)
 
 # CORS config to fix later after completing the frontend
 app.add_middleware(
@@ -23,6 +37,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RouteContextMiddleware)
 
 cloudinary.config(
     cloud_name=settings.cloud_name,
@@ -30,6 +45,32 @@ cloudinary.config(
     api_secret=settings.api_secret,
 )
 
+if settings.storage_backend == "local":
+    app.mount(settings.local_storage_url, StaticFiles(directory=settings.local_storage_path, check_dir=False), name="media")
+
+@app.on_event("startup")
+async def start_background_tasks():
+    background.start_periodic(settings.activity_flush_interval_sec, activity_tracker.flush)
+    background.start_periodic(settings.error_sink_flush_interval_sec, error_sink.flush, wakeup=error_sink.wakeup)
+    background.start(listen_for_versions())
+    preload_templates()
+    background.start_periodic(settings.outbox_poll_interval_sec, outbox_worker.drain, flush_on_shutdown=False)
+    try:
+        await run_in_threadpool(load_revocation_index)
+    except Exception as e:
+        pass
+    background.start_periodic(settings.revocation_evict_interval_sec, revocation_index.evict_expired, flush_on_shutdown=False)
+    background.start_periodic(settings.token_purge_interval_sec, purge_expired_tokens, flush_on_shutdown=False)
+    background.start_periodic(settings.order_totals_interval_sec, recompute_order_totals, flush_on_shutdown=False)
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    await background.stop_all()
+    outbox_worker.close()
+    password_pool.shutdown()
+    image_pipeline.shutdown()
+    await async_engine.dispose()
+
 @app.get("/")
 def root() :
     return {"Hello pharma": "Welcome to the Pharma API"}
\ No newline at end of file
@@ -0,0 +1,106 @@
+from datetime import date
+from sqlalchemy import delete, select, update, func, text, any_, literal, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
+from app.config import settings
+from app.database import SessionLocal
+from app.models import RefreshToken, BlacklistToken, Order, OrderItem
+
+
+def _purge_expired(db, model, batch_size: int) -> int:
+    total = 0
+    while True:
+        expired_ids = select(model.id).where(model.expires_at < func.now()).limit(batch_size).scalar_subquery()
+        deleted = db.execute(delete(model).where(model.id.in_(expired_ids)).execution_options(synchronize_session=False)).rowcount
+        db.commit()
+        total += deleted
+        if deleted < batch_size:
+            return total
+
+
+def _month_start(day: date, offset: int = 0) -> date:
+    month = day.month - 1 + offset
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def ensure_blacklist_partitions(db, months_ahead: int = 2):
+    today = date.today()
+    for offset in range(months_ahead + 1):
+        start, end = _month_start(today, offset), _month_start(today, offset + 1)
+        db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS blacklist_tokens_{start:%Y_%m} PARTITION OF blacklist_tokens "
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        ))
+    db.commit()
+
+
+def drop_expired_blacklist_partitions(db) -> int:
+    # a monthly partition can go once the month after it has started: every token in it has expired
+    cutoff = f"blacklist_tokens_{_month_start(date.today()):%Y_%m}"
+    partitions = db.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'blacklist_tokens' AND c.relname ~ '^blacklist_tokens_[0-9]{4}_[0-9]{2}$'"
+    )).scalars().all()
+    expired = [name for name in partitions if name < cutoff]
+    for name in expired:
+        db.execute(text(f"ALTER TABLE blacklist_tokens DETACH PARTITION {name}"))
+        db.execute(text(f"DROP TABLE {name}"))
+    db.commit()
+    return len(expired)
+
+
+def purge_expired_tokens():
+    db = SessionLocal()
+    try:
+        purged = _purge_expired(db, RefreshToken, settings.token_purge_batch_size)
+        if settings.blacklist_partitioned:
+            ensure_blacklist_partitions(db, settings.refresh_token_expire_day // 28 + 2)
+            drop_expired_blacklist_partitions(db)
+        else:
+            purged += _purge_expired(db, BlacklistToken, settings.token_purge_batch_size)
+        return purged
+    except Exception as e:
+        db.rollback()
+        return 0
+    finally:
+        db.close()
+
+
+def recompute_order_totals(batch_size: int = 10000) -> int:
+    # fills total_amount/item_count for orders that still have item_count = 0 but do have items,
+    # e.g. rows written by the previous release after the totals migration ran. Runs periodically:
+    # the candidates come from the partial index on item_count = 0, so a run with nothing to fix
+    # costs one index probe per empty order
+    totals = (
+        select(
+            OrderItem.order_id,
+            func.round(func.sum(OrderItem.quantity * OrderItem.unit_price), 2).label("total_amount"),
+            func.count().label("item_count"),
+        )
+        .group_by(OrderItem.order_id)
+    )
+    db = SessionLocal()
+    try:
+        updated = 0
+        last_id = 0
+        while True:
+            order_ids = db.scalars(
+                select(Order.id).where(Order.item_count == 0, Order.id > last_id).order_by(Order.id).limit(batch_size)
+            ).all()
+            if not order_ids:
+                return updated
+            last_id = order_ids[-1]
+            batch = totals.where(OrderItem.order_id == any_(literal(order_ids, ARRAY(Integer)))).subquery()
+            updated += db.execute(
+                update(Order)
+                .where(Order.id == batch.c.order_id, Order.item_count == 0)
+                .values(total_amount=batch.c.total_amount, item_count=batch.c.item_count)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            db.commit()
+    except Exception as e:
+        db.rollback()
+        return 0
+    finally:
+        db.close()
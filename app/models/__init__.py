@@ -9,3 +9,7 @@ from .token import Token
 from .session import Session
 from .blacklistToken import BlacklistToken
 from .refreshToken import RefreshToken 
+from .emailOutbox import EmailOutbox
+from .dailySales import DailySales
+from .dailyProductSales import DailyProductSales
+from .cacheVersion import CacheVersion
\ No newline at end of file
@@ -0,0 +1,7 @@
+from app.database import Base
+from sqlalchemy import Column,String,BigInteger,text
+
+class CacheVersion(Base):
+    __tablename__ = "cache_versions"
+    name = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, server_default=text("0"))
@@ -0,0 +1,14 @@
+from app.database import Base
+from sqlalchemy import Column,Integer,Date,Numeric,Enum,text,Index
+from app.enums import OrderStatus
+
+class DailyProductSales(Base):
+    __tablename__ = "daily_product_sales"
+    day = Column(Date, primary_key=True)
+    product_id = Column(Integer, primary_key=True)
+    category_id = Column(Integer, primary_key=True)
+    status = Column(Enum(OrderStatus), primary_key=True)
+    order_count = Column(Integer, nullable=False, server_default=text("0"))
+    quantity = Column(Numeric(14, 3), nullable=False, server_default=text("0"))
+    revenue = Column(Numeric(14, 2), nullable=False, server_default=text("0"))
+    __table_args__ = (Index("ix_daily_product_sales_category_id_day", "category_id", "day"),)
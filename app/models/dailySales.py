@@ -0,0 +1,11 @@
+from app.database import Base
+from sqlalchemy import Column,Integer,Date,Numeric,Enum,text
+from app.enums import OrderStatus
+
+class DailySales(Base):
+    __tablename__ = "daily_sales"
+    day = Column(Date, primary_key=True)
+    status = Column(Enum(OrderStatus), primary_key=True)
+    order_count = Column(Integer, nullable=False, server_default=text("0"))
+    quantity = Column(Numeric(14, 3), nullable=False, server_default=text("0"))
+    revenue = Column(Numeric(14, 2), nullable=False, server_default=text("0"))
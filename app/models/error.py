@@ -7,4 +7,8 @@ class Error(Base):
     id = Column(Integer, nullable=False, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=True)
     text = Column(String, nullable=False)
-    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
\ No newline at end of file
+    fingerprint = Column(String, nullable=True, index=True)
+    route = Column(String, nullable=True)
+    count = Column(Integer, nullable=False, server_default="1")
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    last_seen_at = Column(TIMESTAMP(timezone=True), nullable=True)
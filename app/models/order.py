@@ -1,5 +1,5 @@
 from app.database import Base
-from sqlalchemy import Column,Integer,func,ForeignKey,Enum,DateTime,String
+from sqlalchemy import Column,Integer,func,ForeignKey,Enum,DateTime,String,Index,Numeric,text
 from sqlalchemy.orm import relationship
 from app.enums import OrderStatus
 
@@ -11,7 +11,14 @@ class Order(Base):
     buyer_address = Column(String, nullable=False)
     status = Column(Enum(OrderStatus), nullable=False, server_default=OrderStatus.Paid.value)
     created_on = Column(DateTime(timezone=True), server_default=func.now())
+    total_amount = Column(Numeric(12, 2), nullable=False, server_default=text("0"))
+    item_count = Column(Integer, nullable=False, server_default=text("0"))
     buyer = relationship("User", back_populates="orders")
     items = relationship("OrderItem", back_populates="order")
     session_id = Column(Integer, ForeignKey("sessions.id"), nullable=False)
-    session = relationship("Session", back_populates="orders")
\ No newline at end of file
+    session = relationship("Session", back_populates="orders")
+    __table_args__ = (
+        Index("ix_orders_created_on_id", "created_on", "id"),
+        Index("ix_orders_total_amount_id", "total_amount", "id"),
+        Index("ix_orders_item_count_zero", "id", postgresql_where=text("item_count = 0")),
+    )
\ No newline at end of file
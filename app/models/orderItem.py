@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, Numeric
+from sqlalchemy import Column, Integer, ForeignKey, Numeric, text
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -9,5 +9,7 @@ class OrderItem(Base):
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
     quantity = Column(Numeric(10, 3), nullable=False)
     unit_price = Column(Numeric(10, 2), nullable=False)
+    category_id = Column(Integer, nullable=True)
+    reserved_quantity = Column(Numeric(10, 3), nullable=False, server_default=text("0"))
     order = relationship("Order", back_populates="items")
     product = relationship("Product")
\ No newline at end of file
@@ -1,12 +1,14 @@
 from app.database import Base
-from sqlalchemy import Column,Integer,Numeric,String,ForeignKey
+from sqlalchemy import Column,Integer,Numeric,String,ForeignKey,CheckConstraint
 from sqlalchemy.orm import relationship
 
 
 class Product(Base):
     __tablename__="products"
     id=Column(Integer, primary_key=True)
-    name=Column(String,nullable=False)
+    name=Column(String,nullable=False,unique=True)
     unit_price = Column(Numeric(10, 2), nullable=False)
     category_id=Column(Integer,ForeignKey("categories.id"),nullable=False)
-    category = relationship("Category", back_populates="products")
\ No newline at end of file
+    stock = Column(Numeric(12, 3), nullable=True)
+    category = relationship("Category", back_populates="products")
+    __table_args__ = (CheckConstraint("stock >= 0", name="products_stock_check"),)
\ No newline at end of file
@@ -1,45 +1,71 @@
-from jose import jwt, JWTError, ExpiredSignatureError
+from jose import JWTError, ExpiredSignatureError
 from app.config import settings
 from datetime import datetime, timedelta, timezone
 from app import schemas, models
 from fastapi import Cookie, HTTPException, Request, status,Depends
-from passlib.context import CryptContext
 from sqlalchemy.orm import Session
+from sqlalchemy import select, desc
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordBearer
-from app.database import get_db
-from app.schemas import UserRead
-from app.routers.session import update_last_activity
+from app.database import get_db, get_async_db
+from app.schemas import UserPrincipal
+from app.enums import Role
+from app.routers.session import update_last_activity, get_latest_session_id
+from app.cache import TTLCache
+from app.passwords import password_pool
+from app.jwtCodec import build_codec
+import hashlib
+import time
 
 ouath_schema=OAuth2PasswordBearer(tokenUrl="auth/login")
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 SECRET_KEY = settings.secret_key
 ALGORITHM = settings.algorithm
 ACCESS_TOKEN_EXPIRE_MINUTES = settings.access_token_expire_min
 
+principal_cache = TTLCache(ttl=settings.principal_cache_ttl_sec)
+token_cache = TTLCache(ttl=settings.token_cache_ttl_sec, maxsize=settings.token_cache_size)
+jwt_codec = build_codec(SECRET_KEY, ALGORITHM, settings.jwt_backend)
+
 
 def hash_password(password: str):
-    return pwd_context.hash(password)
+    return password_pool.hash(password)
 
 
 def verify_password(pwd_plain: str, pwd_hashed: str):
-    return pwd_context.verify(pwd_plain, pwd_hashed)
+    return password_pool.verify_and_update(pwd_plain, pwd_hashed)[0]
+
+
+def verify_and_update_password(pwd_plain: str, pwd_hashed: str):
+    return password_pool.verify_and_update(pwd_plain, pwd_hashed)
 
 
 def create_access_token(data: dict):
-    to_encode = data.copy()
     expire = datetime.now(timezone.utc) + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode.update({"exp": expire.timestamp()})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, ALGORITHM)
+    encoded_jwt = jwt_codec.encode({**data, "exp": expire.timestamp()})
     return encoded_jwt
 
 
+def decode_access_token(token: str) -> dict:
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(key)
+    now = time.time()
+    if payload is not None and payload.get("exp", now + 1) > now:
+        return payload
+    payload = jwt_codec.decode(token)
+    exp = payload.get("exp")
+    ttl = settings.token_cache_ttl_sec if exp is None else min(settings.token_cache_ttl_sec, float(exp) - now)
+    if ttl > 0:
+        token_cache.set(key, payload, ttl=ttl)
+    return payload
+
+
 def verif_access_token(token: str, credentials_exception):
     try:
-        payload = jwt.decode(token, SECRET_KEY, ALGORITHM)
+        payload = decode_access_token(token)
         id = payload.get("id")
-        token_data = schemas.TokenData(id=id)
+        token_data = schemas.TokenData(id=id, sid=payload.get("sid"))
         return token_data
     except ExpiredSignatureError:
         raise HTTPException(
@@ -49,14 +75,61 @@ def verif_access_token(token: str, credentials_exception):
         raise credentials_exception
 
 
-def get_current_user( request: Request, db:Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+def get_credentials_exception():
+    return HTTPException(
     status_code=status.HTTP_401_UNAUTHORIZED,
     detail=f"Could not validate credentials",
     headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def get_current_user( request: Request, db:Session = Depends(get_db)):
+    credentials_exception = get_credentials_exception()
     access_token = request.cookies.get("access_token")
     token_data = verif_access_token(access_token, credentials_exception)
-    user = db.query(models.User).filter(models.User.id == token_data.id).first()
-    update_last_activity(db,user.id)
-    return UserRead.model_validate(user)
\ No newline at end of file
+    cache_key = (token_data.id, token_data.sid)
+    cached = principal_cache.get(cache_key)
+    if cached:
+        current_user, session_id = cached
+    else:
+        user = db.query(models.User.id, models.User.role, models.User.status).filter(models.User.id == token_data.id).first()
+        if not user:
+            raise credentials_exception
+        current_user = UserPrincipal.model_validate(user)
+        session_id = token_data.sid or get_latest_session_id(db, user.id)
+        principal_cache.set(cache_key, (current_user, session_id))
+    update_last_activity(session_id)
+    return current_user
+
+
+async def get_current_user_async(request: Request, db: AsyncSession = Depends(get_async_db)):
+    credentials_exception = get_credentials_exception()
+    access_token = request.cookies.get("access_token")
+    token_data = verif_access_token(access_token, credentials_exception)
+    cache_key = (token_data.id, token_data.sid)
+    cached = principal_cache.get(cache_key)
+    if cached:
+        current_user, session_id = cached
+    else:
+        user = (await db.execute(
+            select(models.User.id, models.User.role, models.User.status).where(models.User.id == token_data.id)
+        )).first()
+        if not user:
+            raise credentials_exception
+        current_user = UserPrincipal.model_validate(user)
+        session_id = token_data.sid or await db.scalar(
+            select(models.Session.id).where(models.Session.user_id == user.id).order_by(desc(models.Session.created_at)).limit(1)
+        )
+        principal_cache.set(cache_key, (current_user, session_id))
+    update_last_activity(session_id)
+    return current_user
+
+
+def get_current_admin(current_user: UserPrincipal = Depends(get_current_user)):
+    if current_user.role != Role.Admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
+    return current_user
+
+
+def invalidate_principal(user_id: int):
+    principal_cache.invalidate_where(lambda key: key[0] == user_id)
\ No newline at end of file
@@ -0,0 +1,83 @@
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Iterator, List, Optional
+from sqlalchemy import select
+from app.config import settings
+from app.database import SessionLocal
+from app.enums import OrderStatus
+from app.models import Order, OrderItem, Product
+import csv
+import io
+import json
+
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+COLUMNS = (
+    Order.id.label("order_id"),
+    Order.created_on,
+    Order.status,
+    Order.buyer_id,
+    Order.buyer_phone,
+    Order.buyer_address,
+    OrderItem.id.label("item_id"),
+    OrderItem.product_id,
+    Product.name.label("product_name"),
+    OrderItem.quantity,
+    OrderItem.unit_price,
+    (OrderItem.quantity * OrderItem.unit_price).label("line_total"),
+)
+
+HEADER = [column.key for column in COLUMNS]
+
+
+def build_export_query(date_from: Optional[datetime], date_to: Optional[datetime], statuses: Optional[List[OrderStatus]]):
+    query = (
+        select(*COLUMNS)
+        .outerjoin(OrderItem, OrderItem.order_id == Order.id)
+        .outerjoin(Product, Product.id == OrderItem.product_id)
+    )
+    if date_from:
+        query = query.where(Order.created_on >= date_from)
+    if date_to:
+        query = query.where(Order.created_on < date_to)
+    if statuses:
+        query = query.where(Order.status.in_(statuses))
+    return query.order_by(Order.created_on, Order.id, OrderItem.id)
+
+
+def _plain(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def stream_order_export(query, format: str) -> Iterator[bytes]:
+    # owns its session: the response body outlives the request-scoped one.
+    # yield_per makes psycopg2 use a named (server-side) cursor, so rows arrive in chunks
+    db = SessionLocal()
+    try:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer) if format == "csv" else None
+        if writer:
+            writer.writerow(HEADER)
+        rows = db.execute(query.execution_options(stream_results=True, yield_per=settings.export_fetch_size))
+        for row in rows:
+            values = [_plain(value) for value in row]
+            if writer:
+                writer.writerow(values)
+            else:
+                buffer.write(json.dumps(dict(zip(HEADER, values)), separators=(",", ":")))
+                buffer.write("\n")
+            if buffer.tell() >= settings.export_chunk_bytes:
+                yield buffer.getvalue().encode()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue().encode()
+    finally:
+        db.close()
@@ -0,0 +1,123 @@
+from email.message import EmailMessage
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from threading import Lock
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from sqlalchemy import select
+from sqlalchemy.orm import Session as DbSession
+from app.config import settings
+from app.database import SessionLocal
+from app.enums import EmailStatus
+from app.models import EmailOutbox
+from app import schemas
+import json
+import smtplib
+import ssl
+
+TEMPLATE_FOLDER = Path(__file__).parent / "templates"
+
+templates = Environment(loader=FileSystemLoader(TEMPLATE_FOLDER), autoescape=select_autoescape(["html"]))
+
+
+def preload_templates():
+    for name in templates.list_templates(extensions=["html"]):
+        templates.get_template(name)
+
+
+def enqueue_mail(db: DbSession, mail_data: schemas.MailData):
+    html = templates.get_template(mail_data.template).render(**mail_data.body)
+    db.add(EmailOutbox(recipients=json.dumps(mail_data.emails), subject=mail_data.subject, html=html))
+
+
+class OutboxWorker:
+    def __init__(self):
+        self._smtp = None
+        self._lock = Lock()
+
+    def _connect(self):
+        smtp = smtplib.SMTP(settings.mail_server, settings.mail_port, timeout=settings.mail_timeout_sec)
+        if settings.mail_starttls:
+            smtp.starttls(context=ssl.create_default_context())
+        if settings.mail_use_credentials:
+            smtp.login(settings.mail_username, settings.mail_password)
+        return smtp
+
+    def _get_connection(self):
+        if self._smtp is not None:
+            try:
+                if self._smtp.noop()[0] == 250:
+                    return self._smtp
+            except smtplib.SMTPException as e:
+                pass
+            except OSError as e:
+                pass
+            self.close()
+        self._smtp = self._connect()
+        return self._smtp
+
+    def close(self):
+        if self._smtp is not None:
+            try:
+                self._smtp.quit()
+            except Exception as e:
+                pass
+            self._smtp = None
+
+    def _send(self, email: EmailOutbox):
+        message = EmailMessage()
+        message["Subject"] = email.subject
+        message["From"] = f"{settings.mail_from} <{settings.mail_username}>"
+        message["To"] = ", ".join(json.loads(email.recipients))
+        message.set_content(email.html, subtype="html")
+        try:
+            self._get_connection().send_message(message)
+        except (smtplib.SMTPServerDisconnected, OSError):
+            self.close()
+            raise
+
+    def _send_batch(self, db: DbSession) -> int:
+        now = datetime.now(timezone.utc)
+        emails = db.scalars(
+            select(EmailOutbox)
+            .where(EmailOutbox.status == EmailStatus.Pending, EmailOutbox.next_attempt_at <= now)
+            .order_by(EmailOutbox.id)
+            .limit(settings.mail_batch_size)
+            .with_for_update(skip_locked=True)
+        ).all()
+        for email in emails:
+            try:
+                self._send(email)
+                email.status = EmailStatus.Sent
+                email.sent_at = datetime.now(timezone.utc)
+                email.last_error = None
+            except Exception as e:
+                email.attempts += 1
+                email.last_error = str(e)
+                if email.attempts >= settings.mail_max_attempts:
+                    email.status = EmailStatus.Failed
+                else:
+                    backoff = settings.mail_retry_base_sec * 2 ** (email.attempts - 1)
+                    email.next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=backoff)
+        db.commit()
+        return len(emails)
+
+    def drain(self):
+        if not self._lock.acquire(blocking=False):
+            return 0
+        db = SessionLocal()
+        try:
+            total = 0
+            while True:
+                sent = self._send_batch(db)
+                total += sent
+                if sent < settings.mail_batch_size:
+                    return total
+        except Exception as e:
+            db.rollback()
+            return 0
+        finally:
+            db.close()
+            self._lock.release()
+
+
+outbox_worker = OutboxWorker()
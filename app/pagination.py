@@ -0,0 +1,107 @@
+from sqlalchemy import tuple_, select, func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Sequence
+import base64
+import json
+from app.enums import PaginationMode, SearchMode
+from app.cache import TTLCache
+from app.config import settings
+
+count_cache = TTLCache(ttl=settings.count_cache_ttl_sec)
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(keys: Sequence, values: Sequence[Any]) -> str:
+    # the key names travel with the values, so a cursor is only accepted for the ordering it came from
+    raw = json.dumps({
+        "k": [key.key for key in keys],
+        "v": [v.isoformat() if isinstance(v, datetime) else str(v) if isinstance(v, Decimal) else v for v in values],
+    })
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, keys: Sequence) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+    except ValueError:
+        raise InvalidCursor("Invalid cursor")
+    if not isinstance(data, dict) or data.get("k") != [key.key for key in keys] or not isinstance(data.get("v"), list):
+        raise InvalidCursor("Cursor does not match the requested ordering")
+    decoded = []
+    try:
+        for key, value in zip(keys, data["v"]):
+            python_type = key.type.python_type
+            if python_type is datetime:
+                value = datetime.fromisoformat(value)
+            elif python_type is Decimal:
+                value = Decimal(value)
+            decoded.append(value)
+    except (TypeError, ValueError, ArithmeticError):
+        raise InvalidCursor("Invalid cursor")
+    return decoded
+
+
+def is_cursor_mode(filter) -> bool:
+    # Similarity-ranked results are not ordered by the keyset, so they always page by number
+    if filter.name_substr and filter.search_mode == SearchMode.Similarity:
+        return False
+    return bool(filter.cursor) or filter.pagination == PaginationMode.Cursor
+
+
+def apply_page(query, filter, keys: Sequence):
+    query = query.order_by(*keys)
+    if is_cursor_mode(filter):
+        if filter.cursor:
+            query = query.where(tuple_(*keys) > tuple_(*decode_cursor(filter.cursor, keys)))
+        return query.limit(filter.page_size + 1)
+    return query.offset((filter.page_number - 1) * filter.page_size).limit(filter.page_size + 1)
+
+
+def split_page(rows: Sequence, filter):
+    rows = list(rows)
+    return rows[:filter.page_size], len(rows) > filter.page_size
+
+
+def get_next_cursor(rows: Sequence, filter, keys: Sequence, has_more: bool) -> Optional[str]:
+    if not is_cursor_mode(filter) or not has_more or not rows:
+        return None
+    last = rows[-1]
+    return encode_cursor(keys, [getattr(last, key.key) for key in keys])
+
+
+async def _count_table(db: AsyncSession, model) -> int:
+    if settings.estimated_counts:
+        estimate = await db.scalar(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"),
+            {"table": model.__tablename__},
+        )
+        if estimate is not None and estimate >= 0:
+            return int(estimate)
+    return await db.scalar(select(func.count()).select_from(model))
+
+
+async def get_total_records(db: AsyncSession, query, model, filtered: bool) -> int:
+    if filtered:
+        return await db.scalar(select(func.count()).select_from(query.subquery()))
+    total_records = count_cache.get(model.__tablename__)
+    if total_records is None:
+        total_records = await _count_table(db, model)
+        count_cache.set(model.__tablename__, total_records)
+    return total_records
+
+
+def get_total_pages(total_records: Optional[int], filter) -> Optional[int]:
+    if total_records is None:
+        return None
+    return (total_records + filter.page_size - 1) // filter.page_size
+
+
+def invalidate_count(*tables: str):
+    for table in tables:
+        count_cache.invalidate(table)
@@ -0,0 +1,86 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from threading import BoundedSemaphore, Lock
+from passlib.context import CryptContext
+from app.config import settings
+
+_context = None
+
+
+def build_context(rounds: int) -> CryptContext:
+    # pinning min/max to the configured cost makes verify_and_update flag hashes made with any other cost
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+def _init_worker(rounds: int):
+    global _context
+    _context = build_context(rounds)
+
+
+def _hash(password: str) -> str:
+    return _context.hash(password)
+
+
+def _verify_and_update(pwd_plain: str, pwd_hashed: str):
+    return _context.verify_and_update(pwd_plain, pwd_hashed)
+
+
+class PasswordPoolBusy(Exception):
+    pass
+
+
+class PasswordPool:
+    def __init__(self, workers: int, max_pending: int, rounds: int):
+        self.workers = workers
+        self.rounds = rounds
+        self._slots = BoundedSemaphore(max_pending)
+        self._executor = None
+        self._lock = Lock()
+        if workers <= 0:
+            _init_worker(rounds)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork: the server process already runs threads and holds DB pool connections
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.rounds,),
+                )
+            return self._executor
+
+    def _run(self, func, *args):
+        if self.workers <= 0:
+            return func(*args)
+        if not self._slots.acquire(blocking=False):
+            raise PasswordPoolBusy()
+        try:
+            future = self._get_executor().submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda f: self._slots.release())
+        return future.result()
+
+    def hash(self, password: str) -> str:
+        return self._run(_hash, password)
+
+    def verify_and_update(self, pwd_plain: str, pwd_hashed: str):
+        return self._run(_verify_and_update, pwd_plain, pwd_hashed)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_pool = PasswordPool(settings.password_pool_size, settings.password_pool_max_pending, settings.bcrypt_rounds)
@@ -0,0 +1,141 @@
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Iterable, Tuple
+from sqlalchemy import select, func
+from app.config import settings
+from app.database import SessionLocal
+from app.models import BlacklistToken
+import hashlib
+import math
+import time
+
+
+def _to_epoch(expires_at: datetime) -> float:
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=timezone.utc)
+    return expires_at.timestamp()
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.sha256(item.encode()).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class MemoryRevocationBackend:
+    # the bloom filter answers "definitely not revoked" without touching the exact set;
+    # it is rebuilt from the exact set when expired entries are evicted
+    def __init__(self):
+        self._lock = Lock()
+        self._exact: dict[str, float] = {}
+        self._bloom = self._new_bloom(0)
+        self.loaded = False
+
+    @staticmethod
+    def _new_bloom(count: int) -> BloomFilter:
+        return BloomFilter(max(settings.revocation_bloom_capacity, count * 2), settings.revocation_bloom_error_rate)
+
+    def add(self, token_hash: str, expires_at: datetime):
+        with self._lock:
+            self._exact[token_hash] = _to_epoch(expires_at)
+            self._bloom.add(token_hash)
+
+    def load(self, items: Iterable[Tuple[str, datetime]]):
+        exact = {token_hash: _to_epoch(expires_at) for token_hash, expires_at in items}
+        bloom = self._new_bloom(len(exact))
+        for token_hash in exact:
+            bloom.add(token_hash)
+        with self._lock:
+            exact.update(self._exact)
+            for token_hash in self._exact:
+                bloom.add(token_hash)
+            self._exact, self._bloom = exact, bloom
+            self.loaded = True
+
+    def might_be_revoked(self, token_hash: str) -> bool:
+        if not self.loaded:
+            return True
+        if token_hash not in self._bloom:
+            return False
+        expires_at = self._exact.get(token_hash)
+        return expires_at is None or expires_at > time.time()
+
+    def evict_expired(self):
+        now = time.time()
+        with self._lock:
+            exact = {token_hash: expires_at for token_hash, expires_at in self._exact.items() if expires_at > now}
+            if len(exact) == len(self._exact):
+                return 0
+            bloom = self._new_bloom(len(exact))
+            for token_hash in exact:
+                bloom.add(token_hash)
+            evicted = len(self._exact) - len(exact)
+            self._exact, self._bloom = exact, bloom
+            return evicted
+
+
+class RedisRevocationBackend:
+    # shared across workers; keys expire with the token so no eviction pass is needed
+    def __init__(self, url: str):
+        import redis
+        self.client = redis.Redis.from_url(url)
+        self.prefix = "revoked:"
+        self.loaded = True
+
+    def add(self, token_hash: str, expires_at: datetime):
+        expires_at_epoch = int(_to_epoch(expires_at))
+        if expires_at_epoch <= time.time():
+            return
+        try:
+            self.client.set(self.prefix + token_hash, 1, exat=expires_at_epoch)
+        except Exception as e:
+            pass
+
+    def load(self, items: Iterable[Tuple[str, datetime]]):
+        for token_hash, expires_at in items:
+            self.add(token_hash, expires_at)
+
+    def might_be_revoked(self, token_hash: str) -> bool:
+        try:
+            return bool(self.client.exists(self.prefix + token_hash))
+        except Exception as e:
+            return True
+
+    def evict_expired(self):
+        return 0
+
+
+def build_backend():
+    if settings.revocation_backend == "redis":
+        return RedisRevocationBackend(settings.redis_url)
+    return MemoryRevocationBackend()
+
+
+revocation_index = build_backend()
+
+
+def load_revocation_index():
+    db = SessionLocal()
+    try:
+        rows = db.execute(
+            select(BlacklistToken.token_hash, BlacklistToken.expires_at)
+            .where(BlacklistToken.expires_at > func.now())
+            .execution_options(yield_per=10000)
+        )
+        revocation_index.load((row.token_hash, row.expires_at) for row in rows)
+    finally:
+        db.close()
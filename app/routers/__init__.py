@@ -3,4 +3,6 @@ from .category import router
 from .auth import router
 from .product import router
 from .refreshToken import router
-from .order import router
\ No newline at end of file
+from .order import router
+from .internal import router
+from .analytics import router
\ No newline at end of file
@@ -0,0 +1,122 @@
+from datetime import date
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query, BackgroundTasks
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.config import settings
+from app.database import get_async_db
+from app.enums import OrderStatus
+from app.models import DailySales, DailyProductSales, Product, Category
+from app.schemas import OurBaseModelOut, UserPrincipal, AnalyticsResponse, DailySalesRead, ProductSalesRead, CategorySalesRead
+from app.routers.error import classify_error, add_error
+from app.oauth2 import get_current_admin, get_current_user_async
+from app.salesSummary import rebuild_sales_in_background
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+
+def _in_range(model, date_from: date, date_to: date, status: Optional[List[OrderStatus]]):
+    conditions = [model.day >= date_from, model.day < date_to]
+    if status:
+        conditions.append(model.status.in_(status))
+    return conditions
+
+
+@router.get("/daily")
+async def get_daily_sales(date_from: date, date_to: date, status: Optional[List[OrderStatus]] = Query(None), db: AsyncSession = Depends(get_async_db), current_user: UserPrincipal = Depends(get_current_user_async)):
+    try:
+        rows = (await db.execute(
+            select(
+                DailySales.day,
+                func.sum(DailySales.order_count).label("order_count"),
+                func.sum(DailySales.quantity).label("quantity"),
+                func.sum(DailySales.revenue).label("revenue"),
+            )
+            .where(*_in_range(DailySales, date_from, date_to, status))
+            .group_by(DailySales.day)
+            .order_by(DailySales.day)
+        )).all()
+        return AnalyticsResponse[DailySalesRead](
+            data=[DailySalesRead.model_validate(r) for r in rows],
+            status=200,
+            message="Daily sales fetched"
+        )
+    except Exception as e:
+        error = classify_error(e)
+        return OurBaseModelOut(status=error.status, message=error.message)
+
+
+@router.get("/products")
+async def get_product_sales(date_from: date, date_to: date, status: Optional[List[OrderStatus]] = Query(None), limit: int = 50, db: AsyncSession = Depends(get_async_db), current_user: UserPrincipal = Depends(get_current_user_async)):
+    try:
+        sales = (
+            select(
+                DailyProductSales.product_id,
+                func.sum(DailyProductSales.order_count).label("order_count"),
+                func.sum(DailyProductSales.quantity).label("quantity"),
+                func.sum(DailyProductSales.revenue).label("revenue"),
+            )
+            .where(*_in_range(DailyProductSales, date_from, date_to, status))
+            .group_by(DailyProductSales.product_id)
+            .order_by(func.sum(DailyProductSales.revenue).desc())
+            .limit(limit)
+            .subquery()
+        )
+        rows = (await db.execute(
+            select(sales, Product.name.label("product_name"))
+            .outerjoin(Product, Product.id == sales.c.product_id)
+            .order_by(sales.c.revenue.desc())
+        )).all()
+        return AnalyticsResponse[ProductSalesRead](
+            data=[ProductSalesRead.model_validate(r) for r in rows],
+            status=200,
+            message="Product sales fetched"
+        )
+    except Exception as e:
+        error = classify_error(e)
+        return OurBaseModelOut(status=error.status, message=error.message)
+
+
+@router.get("/categories")
+async def get_category_sales(date_from: date, date_to: date, status: Optional[List[OrderStatus]] = Query(None), db: AsyncSession = Depends(get_async_db), current_user: UserPrincipal = Depends(get_current_user_async)):
+    try:
+        sales = (
+            select(
+                DailyProductSales.category_id,
+                func.sum(DailyProductSales.quantity).label("quantity"),
+                func.sum(DailyProductSales.revenue).label("revenue"),
+            )
+            .where(*_in_range(DailyProductSales, date_from, date_to, status))
+            .group_by(DailyProductSales.category_id)
+            .subquery()
+        )
+        rows = (await db.execute(
+            select(sales, Category.name.label("category_name"))
+            .outerjoin(Category, Category.id == sales.c.category_id)
+            .order_by(sales.c.revenue.desc())
+        )).all()
+        return AnalyticsResponse[CategorySalesRead](
+            data=[CategorySalesRead.model_validate(r) for r in rows],
+            status=200,
+            message="Category sales fetched"
+        )
+    except Exception as e:
+        error = classify_error(e)
+        return OurBaseModelOut(status=error.status, message=error.message)
+
+
+@router.post("/rebuild")
+def rebuild_sales_summary(date_from: date, date_to: date, background_tasks: BackgroundTasks, current_user: UserPrincipal = Depends(get_current_admin)):
+    try:
+        if date_from >= date_to:
+            return OurBaseModelOut(status=400, message="date_from must be before date_to")
+        days = (date_to - date_from).days
+        if days > settings.analytics_rebuild_max_days:
+            return OurBaseModelOut(status=400, message=f"Rebuild at most {settings.analytics_rebuild_max_days} days at a time")
+        # runs after the response, one day per transaction
+        background_tasks.add_task(rebuild_sales_in_background, date_from, date_to)
+        return OurBaseModelOut(status=202, message=f"Sales summary rebuild scheduled for {days} days")
+    except Exception as e:
+        error = classify_error(e)
+        add_error(error, current_user.id)
+        return OurBaseModelOut(status=error.status, message=error.message)
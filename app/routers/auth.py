@@ -1,24 +1,26 @@
-from fastapi import APIRouter,Depends,Request,Response
-from app.schemas import OurBaseModelOut, MailData, ForgetPassword, ConfirmData, ResetPassword, UserRead
-from app.oauth2 import create_access_token,verify_password,hash_password
+from fastapi import APIRouter,Depends,Request,Response,BackgroundTasks
+from app.schemas import OurBaseModelOut, MailData, ForgetPassword, ConfirmData, ResetPassword, UserPrincipal
+from app.oauth2 import create_access_token,verify_and_update_password,hash_password
+from app.passwords import PasswordPoolBusy
 from app.database import get_db
 from sqlalchemy.orm import Session as DbSession
 from app.models import User,Token,Session
 from fastapi.security import  OAuth2PasswordRequestForm
 from datetime import datetime
-from app.utils import send_mail
+from app.outbox import enqueue_mail
 import uuid
 from app.routers.session import create_session
+from app.geoip import enrich_session_location
 from app.routers.refreshToken import create_refresh_token, blacklisted_refresh_tokens
 from app.config import settings
-from app.oauth2 import get_current_user
+from app.oauth2 import get_current_user, invalidate_principal
 from app.enums import AccountStatus
 
 router = APIRouter(prefix="/auth", tags=["Authenticate"])
 
 
 @router.post("/login")
-def login(request: Request, response: Response, user_credentials: OAuth2PasswordRequestForm = Depends(), db:DbSession = Depends(get_db)):
+def login(request: Request, response: Response, background_tasks: BackgroundTasks, user_credentials: OAuth2PasswordRequestForm = Depends(), db:DbSession = Depends(get_db)):
     try:
        user = db.query(User).filter(User.email == user_credentials.username).first()
 
@@ -28,16 +30,19 @@ def login(request: Request, response: Response, user_credentials: OAuth2Password
        if user.status == AccountStatus.Inactive:
             return OurBaseModelOut(status=400, message="Your account isn’t confirmed yet. Please check your email to verify it.")
        
-       if not verify_password(user_credentials.password,user.password):
+       password_ok, new_hash = verify_and_update_password(user_credentials.password,user.password)
+       if not password_ok:
             return OurBaseModelOut(status=400,message="Wrong password")
+       if new_hash:
+            user.password = new_hash
        
        active_session = db.query(Session).filter(Session.user_id == user.id, Session.is_active == True).first()
        if active_session:
            blacklisted_refresh_tokens(db, active_session.id)
            active_session.is_active = False
         
-       access_token = create_access_token({"id":user.id,"role":user.role.value})
        new_session = create_session(db, user.id,request)
+       access_token = create_access_token({"id":user.id,"role":user.role.value,"sid":new_session.id})
        refresh_token = create_refresh_token(db, new_session.id)
 
        response.set_cookie(
@@ -58,13 +63,18 @@ def login(request: Request, response: Response, user_credentials: OAuth2Password
        )
        
        db.commit()
+       invalidate_principal(user.id)
+       background_tasks.add_task(enrich_session_location, new_session.id, new_session.ip_address)
        return OurBaseModelOut(status=200, message="Login successfuly")
+    except PasswordPoolBusy:
+        db.rollback()
+        return OurBaseModelOut(status=503, message="Too many login attempts in progress. Please try again.")
     except Exception as error:
         db.rollback()
         return OurBaseModelOut(status=400, message="Login failed. Please try again.")
 
 @router.post("/forget_password")
-async def forget_password(data:ForgetPassword,db:DbSession=Depends(get_db)):
+def forget_password(data:ForgetPassword,db:DbSession=Depends(get_db)):
     try:
         user = db.query(User).filter(User.email == data.email).first()
         if not user:
@@ -73,7 +83,7 @@ async def forget_password(data:ForgetPassword,db:DbSession=Depends(get_db)):
         token = Token(token=uuid.uuid4(),user_id=user.id)
         db.add(token)
 
-        await send_mail(MailData(
+        enqueue_mail(db, MailData(
             emails=[user.email],
             body={"name": f"{user.first_name} {user.last_name}","code":token.token},
             template="reset_password.html",
@@ -100,6 +110,7 @@ def confirm_account(confirm_data:ConfirmData,db:DbSession=Depends(get_db)):
         db.query(User).filter(User.id == token.user_id).update({User.status: AccountStatus.Active})
         db.query(Token).filter(Token.id == token.id).update({Token.isUsed:True})
         db.commit()
+        invalidate_principal(token.user_id)
         return OurBaseModelOut(status=200,message="Account confirmed successfuly")
     except Exception as error:
         return OurBaseModelOut(status=400,message="Confirm account failed. Please try again.")
@@ -126,13 +137,14 @@ def reset_password(confirm_data:ResetPassword, db:DbSession=Depends(get_db)):
         return OurBaseModelOut(status=400,message="Update password failed. Please try again.")
     
 @router.get("/logout")
-def logout(response: Response, db: DbSession = Depends(get_db), current_user: UserRead  = Depends(get_current_user)):
+def logout(response: Response, db: DbSession = Depends(get_db), current_user: UserPrincipal  = Depends(get_current_user)):
     try:
         active_session = db.query(Session).filter(Session.user_id == current_user.id, Session.is_active == True).first()
         if active_session:
             blacklisted_refresh_tokens(db, active_session.id)
             active_session.is_active = False
             db.commit()
+        invalidate_principal(current_user.id)
         
         response.delete_cookie("refresh_token")
         response.delete_cookie("access_token")
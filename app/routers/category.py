@@ -1,12 +1,20 @@
-from fastapi import APIRouter, Depends, File, UploadFile
+from fastapi import APIRouter, Depends, File, UploadFile, Request
 from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from app.database import get_db, get_async_db
 from app.models import Category
-from app.schemas import CategoryCreate, CategoryRead, PagedResponse, OurBaseModelOut, CategoryUpdate, UserRead, BaseFilter
-from app.routers.error import get_error_detail,add_error
-import cloudinary.uploader
+from app.schemas import CategoryCreate, CategoryRead, OurBaseModelOut, CategoryUpdate, UserPrincipal, BaseFilter
+from app.routers.error import classify_error, add_error, register_error_keys
+from app.images import image_pipeline, spool_upload
+import os
 from app.utils import convert_to_createCategorySchema, convert_to_updateCategorySchema
-from app.oauth2 import get_current_user
+from app.oauth2 import get_current_user, get_current_user_async
+from app.loaders import loader_options
+from app.serialization import paged_body
+from app.search import apply_name_search
+from app.httpCache import CachedView, bump_version, load_versions, load_versions_async
+from app.pagination import apply_page, split_page, get_next_cursor, is_cursor_mode, get_total_records, get_total_pages, invalidate_count
 
 router = APIRouter(prefix="/categories", tags=["Categories"])
 
@@ -15,103 +23,125 @@ error_keys={
      "categories_user_id_fkey":{"message":"User not found","status":404}
 }
 
+register_error_keys(error_keys)
+
+page_keys = (Category.id,)
+
+cache_tables = ("categories", "products")
+
 @router.post("/")
-def create_category(category: CategoryCreate = Depends(convert_to_createCategorySchema), db: Session = Depends(get_db), user_id: int = 1, category_image: UploadFile = File(...), current_user: UserRead = Depends(get_current_user)):
+def create_category(category: CategoryCreate = Depends(convert_to_createCategorySchema), db: Session = Depends(get_db), user_id: int = 1, category_image: UploadFile = File(...), current_user: UserPrincipal = Depends(get_current_user)):
+    spooled_path = None
     try:
         new_category = category.model_dump()
-        image_data = cloudinary.uploader.upload(category_image.file)
-        new_category["image_link"] = image_data.get("secure_url")
-        new_category["public_id"] = image_data.get("public_id")
+        spooled_path = spool_upload(category_image)
+        new_category["public_id"] = image_pipeline.new_public_id("categories")
         db_category = Category(**new_category, user_id=user_id)
         db.add(db_category)
+        bump_version(db, "categories")
         db.commit()
+        invalidate_count("categories")
+        image_pipeline.submit_category_image(db_category.id, spooled_path, new_category["public_id"])
+        spooled_path = None
         return OurBaseModelOut (status=201, message="Category created successfully")
     except Exception as e:
         db.rollback()
-        add_error(str(e),db,current_user.id)
+        error = classify_error(e)
+        add_error(error,current_user.id)
 
-        if(new_category.get("public_id")):
-            cloudinary.uploader.destroy(new_category.get("public_id"))
-            
-        error_detail = get_error_detail(str(e), error_keys)
-        return OurBaseModelOut(status=error_detail["status"], message=error_detail["message"])
+        if spooled_path:
+            os.unlink(spooled_path)
+
+        return OurBaseModelOut(status=error.status, message=error.message)
 
 @router.get("/")
-def get_categories(db: Session = Depends(get_db),filter: BaseFilter = Depends() , current_user: UserRead = Depends(get_current_user)):
+async def get_categories(request: Request, db: AsyncSession = Depends(get_async_db),filter: BaseFilter = Depends() , current_user: UserPrincipal = Depends(get_current_user_async)):
     try:
-        query = db.query(Category)
+        view = CachedView(request, "categories", await load_versions_async(db, cache_tables), filter)
+        if view.hit:
+            return view.hit
+
+        query = select(Category)
 
-        if filter.name_substr:
-            query = query.filter(Category.name.ilike(f"%{filter.name_substr}%"))
+        query = await apply_name_search(db, query, Category.name, filter)
         
-        total_records = query.count()
-        categories = query.offset((filter.page_number - 1) * filter.page_size).limit(filter.page_size).all()
-        total_pages = (total_records + filter.page_size - 1) // filter.page_size
-        return PagedResponse[CategoryRead](
-            data=[CategoryRead.model_validate(c) for c in categories],
-            page_number=filter.page_number,
+        total_records = await get_total_records(db, query, Category, filtered=bool(filter.name_substr)) if filter.include_total else None
+        categories = (await db.execute(
+            apply_page(query.options(*loader_options(Category, CategoryRead)), filter, page_keys)
+        )).scalars().all()
+        categories, has_more = split_page(categories, filter)
+        return view.store(paged_body(
+            CategoryRead,
+            categories,
+            page_number=None if is_cursor_mode(filter) else filter.page_number,
             page_size=filter.page_size,
-            total_pages=total_pages,
+            total_pages=get_total_pages(total_records, filter),
             total_records=total_records,
+            next_cursor=get_next_cursor(categories, filter, page_keys, has_more),
+            has_more=has_more,
             status=200,
             message="Categories fetched"
-        )
+        ))
     except Exception as e:
-        error_detail=get_error_detail(str(e), error_keys)
-        return OurBaseModelOut(status=error_detail["status"], message=error_detail["message"]) 
+        error = classify_error(e)
+        return OurBaseModelOut(status=error.status, message=error.message) 
 
 @router.get("/{category_id}")
-def get_category(category_id: int, db: Session = Depends(get_db), current_user: UserRead = Depends(get_current_user)):
+def get_category(category_id: int, request: Request, db: Session = Depends(get_db), current_user: UserPrincipal = Depends(get_current_user)):
     try:
-        category = db.query(Category).filter(Category.id == category_id).first()
+        view = CachedView(request, f"categories/{category_id}", load_versions(db, cache_tables))
+        if view.hit:
+            return view.hit
+
+        category = db.query(Category).options(*loader_options(Category, CategoryRead)).filter(Category.id == category_id).first()
         if not category:
             return OurBaseModelOut(status=404, message="Category not found")
-        return CategoryRead.model_validate(category)
+        return view.store(CategoryRead.model_validate(category))
     except Exception as e:
-        error_detail = get_error_detail(str(e),error_keys)
-        return OurBaseModelOut(status=error_detail["status"], message=error_detail["message"]) 
+        error = classify_error(e)
+        return OurBaseModelOut(status=error.status, message=error.message) 
 
 @router.put("/{category_id}")
-def update_category(category_id: int, category: CategoryUpdate = Depends(convert_to_updateCategorySchema), db: Session = Depends(get_db), category_image: UploadFile = File(None), current_user: UserRead = Depends(get_current_user)):
+def update_category(category_id: int, category: CategoryUpdate = Depends(convert_to_updateCategorySchema), db: Session = Depends(get_db), category_image: UploadFile = File(None), current_user: UserPrincipal = Depends(get_current_user)):
     try:
         new_data = {}
-        uploaded_public_id = None
+        spooled_path = None
         db_category = db.query(Category).filter(Category.id == category_id).first()
 
         if not db_category:
             return OurBaseModelOut(status=404, message="Category not found")
         
         new_data = category.model_dump(exclude_unset=True)
+        previous_public_id = db_category.public_id
 
         if category_image:
-            image_data = cloudinary.uploader.upload(category_image.file)
-            uploaded_public_id = image_data.get("public_id")
-            new_data["public_id"] = uploaded_public_id
-            new_data["image_link"] = image_data.get("secure_url")
+            spooled_path = spool_upload(category_image)
+            new_data["public_id"] = image_pipeline.new_public_id("categories")
         
         for key, value in new_data.items():
             setattr(db_category, key, value)
 
+        bump_version(db, "categories")
         db.commit()
-        db.refresh(db_category)
 
-        if category_image and db_category.public_id != uploaded_public_id:
-            cloudinary.uploader.destroy(db_category.public_id)
+        if spooled_path:
+            image_pipeline.submit_category_image(category_id, spooled_path, new_data["public_id"], previous_public_id)
+            spooled_path = None
 
         return OurBaseModelOut(status=200, message="Category updated successfully")
     except Exception as e:
         db.rollback()
-        add_error(str(e),db,current_user.id)
+        error = classify_error(e)
+        add_error(error,current_user.id)
 
-        if(uploaded_public_id):
-            cloudinary.uploader.destroy(uploaded_public_id)
+        if spooled_path:
+            os.unlink(spooled_path)
         
-        error_detail = get_error_detail(str(e),error_keys)
-        return OurBaseModelOut(status=error_detail["status"], message=error_detail["message"]) 
+        return OurBaseModelOut(status=error.status, message=error.message) 
 
 
 @router.delete("/{category_id}")
-def delete_category(category_id: int, db: Session = Depends(get_db), current_user: UserRead = Depends(get_current_user)):
+def delete_category(category_id: int, db: Session = Depends(get_db), current_user: UserPrincipal = Depends(get_current_user)):
     try:
         query = db.query(Category).filter(Category.id == category_id)
         db_category = query.first()
@@ -119,12 +149,15 @@ def delete_category(category_id: int, db: Session = Depends(get_db), current_use
         if not db_category:
             return OurBaseModelOut(status=404, message="Category not found")
         
-        cloudinary.uploader.destroy(db_category.public_id)
+        public_id = db_category.public_id
         query.delete()
+        bump_version(db, "categories")
         db.commit()
+        invalidate_count("categories")
+        image_pipeline.queue_delete(public_id)
         return OurBaseModelOut(status=200, message="Category deleted successfully")
     except Exception as e:
         db.rollback()
-        add_error(str(e),db,current_user.id)
-        error_detail = get_error_detail(str(e),error_keys)
-        return OurBaseModelOut(status=error_detail["status"], message=error_detail["message"]) 
+        error = classify_error(e)
+        add_error(error,current_user.id)
+        return OurBaseModelOut(status=error.status, message=error.message) 
@@ -1,22 +1,165 @@
-from typing import Optional
+from contextvars import ContextVar
+from functools import cached_property
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Optional, Union
+from sqlalchemy import insert
 from app import models
-from app.schemas import OurBaseModelOut
-from sqlalchemy.orm import Session
-
-
-def get_error_detail(error: str, error_keys: dict):
-    for err in error_keys:
-        if err in error:
-            return error_keys[err]
-    return dict({"message": "Somthing went wrong", "status": 400})
-
-
-def add_error(text: str, db: Session, user_id: Optional[int] = None):
-    if not isinstance(text, str):
-        raise ValueError(f"Expected 'text' to be a string, got {type(text)}")
-    try:
-        error_db = models.Error(text=text, user_id=user_id)
-        db.add(error_db)
-        db.commit()
-    except Exception as error:
-        return OurBaseModelOut(status=400, message=f"Error while adding error: {str(error)}")
\ No newline at end of file
+from app.config import settings
+from app.database import SessionLocal
+from app.background import Wakeup
+from app.pagination import InvalidCursor
+import hashlib
+import re
+
+current_route: ContextVar[Optional[str]] = ContextVar("current_route", default=None)
+
+_sql_params = re.compile(r"\[parameters: .*?\]", re.S)
+_background = re.compile(r"\(Background on this error at: .*?\)")
+_quoted = re.compile(r"'[^']*'")
+_numbers = re.compile(r"\d+")
+_spaces = re.compile(r"\s+")
+_path_ids = re.compile(r"/\d+(?=/|$)")
+
+
+DEFAULT_ERROR_DETAIL = {"message": "Somthing went wrong", "status": 400}
+
+SQLSTATE_DETAILS = {
+    "23505": {"message": "Resource already exists", "status": 400},
+    "23503": {"message": "Related resource not found", "status": 404},
+    "23502": {"message": "Missing required field", "status": 400},
+    "22P02": {"message": "Invalid value", "status": 400},
+    "22001": {"message": "Value too long", "status": 400},
+}
+
+error_registry: dict[str, dict] = {}
+
+
+def register_error_keys(error_keys: dict):
+    error_registry.update(error_keys)
+
+
+class ClassifiedError:
+    def __init__(self, exception: Exception, constraint: Optional[str], sqlstate: Optional[str], detail: dict):
+        self.exception = exception
+        self.constraint = constraint
+        self.sqlstate = sqlstate
+        self.message = detail["message"]
+        self.status = detail["status"]
+
+    @cached_property
+    def text(self) -> str:
+        return str(self.exception)
+
+
+def classify_error(e: Exception) -> ClassifiedError:
+    orig = getattr(e, "orig", None)
+    # psycopg2 exposes diag/pgcode, asyncpg errors sit on the adapter's __cause__
+    diag = getattr(orig, "diag", None) or getattr(orig, "__cause__", None)
+    constraint = getattr(diag, "constraint_name", None)
+    sqlstate = getattr(orig, "pgcode", None) or getattr(diag, "sqlstate", None)
+    detail = error_registry.get(constraint) or SQLSTATE_DETAILS.get(sqlstate) or DEFAULT_ERROR_DETAIL
+    if isinstance(e, InvalidCursor):
+        detail = {"message": str(e), "status": 400}
+    return ClassifiedError(e, constraint, sqlstate, detail)
+
+
+def normalize_route(method: str, path: str) -> str:
+    return f"{method} {_path_ids.sub('/{id}', path)}"
+
+
+def fingerprint(text: str, route: Optional[str]) -> str:
+    normalized = _background.sub("", _sql_params.sub("", text))
+    normalized = _spaces.sub(" ", _numbers.sub("#", _quoted.sub("?", normalized))).strip()
+    return hashlib.sha1(f"{route}|{normalized}".encode()).hexdigest()
+
+
+class ErrorSink:
+    def __init__(self, max_pending: int, flush_size: int):
+        self.max_pending = max_pending
+        self.flush_size = flush_size
+        self.dropped = 0
+        self.flushed = 0
+        self._pending: dict[tuple, dict] = {}
+        self._lock = Lock()
+        self._flush_lock = Lock()
+        self.wakeup = Wakeup()
+
+    def add(self, error: Union[ClassifiedError, str], user_id: Optional[int] = None, route: Optional[str] = None):
+        if isinstance(error, ClassifiedError) and (error.constraint or error.sqlstate):
+            key = (fingerprint(f"{error.sqlstate}:{error.constraint}", route), user_id)
+        else:
+            key = (fingerprint(error.text if isinstance(error, ClassifiedError) else error, route), user_id)
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            record = self._pending.get(key)
+            if record:
+                record["count"] += 1
+                record["last_seen_at"] = now
+            elif len(self._pending) >= self.max_pending:
+                self.dropped += 1
+                return
+            else:
+                self._pending[key] = {
+                    "fingerprint": key[0],
+                    "user_id": user_id,
+                    "route": route,
+                    "text": error.text if isinstance(error, ClassifiedError) else error,
+                    "count": 1,
+                    "created_at": now,
+                    "last_seen_at": now,
+                }
+            should_flush = len(self._pending) >= self.flush_size
+        if should_flush:
+            # the periodic flusher does the insert, the request only signals it
+            self.wakeup.set()
+
+    def flush(self):
+        if not self._flush_lock.acquire(blocking=False):
+            return 0
+        try:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            db = SessionLocal()
+            try:
+                db.execute(insert(models.Error), list(pending.values()))
+                db.commit()
+                self.flushed += len(pending)
+                return len(pending)
+            except Exception as e:
+                db.rollback()
+                with self._lock:
+                    self.dropped += sum(record["count"] for record in pending.values())
+                return 0
+            finally:
+                db.close()
+        finally:
+            self._flush_lock.release()
+
+    def snapshot(self) -> dict:
+        return {"pending": len(self._pending), "flushed": self.flushed, "dropped": self.dropped}
+
+
+error_sink = ErrorSink(settings.error_sink_max_pending, settings.error_sink_flush_size)
+
+
+def add_error(error: Union[ClassifiedError, str], user_id: Optional[int] = None):
+    if not isinstance(error, (ClassifiedError, str)):
+        raise ValueError(f"Expected 'error' to be a ClassifiedError or a string, got {type(error)}")
+    error_sink.add(error, user_id, current_route.get())
+
+
+class RouteContextMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = current_route.set(normalize_route(scope["method"], scope["path"]))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_route.reset(token)
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends
+from app.schemas import OurBaseModelOut, UserPrincipal
+from app.oauth2 import get_current_admin
+from app.poolMetrics import sync_pool_metrics, async_pool_metrics
+from app.routers.error import error_sink
+
+router = APIRouter(prefix="/internal", tags=["Internal"])
+
+
+@router.get("/pool")
+def get_pool_metrics(current_user: UserPrincipal = Depends(get_current_admin)):
+    try:
+        return {
+            "status": 200,
+            "message": "Pool metrics fetched",
+            "data": [sync_pool_metrics.snapshot(), async_pool_metrics.snapshot()],
+        }
+    except Exception as e:
+        return OurBaseModelOut(status=400, message="An error occurred while fetching pool metrics")
+
+
+@router.get("/errors")
+def get_error_sink_metrics(current_user: UserPrincipal = Depends(get_current_admin)):
+    try:
+        return {"status": 200, "message": "Error sink metrics fetched", "data": error_sink.snapshot()}
+    except Exception as e:
+        return OurBaseModelOut(status=400, message="An error occurred while fetching error sink metrics")
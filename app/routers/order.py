@@ -1,11 +1,26 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from typing import List, Optional
 from sqlalchemy.orm import Session as DbSession
-from app.database import get_db
-from app.schemas import OrderBase, OrderRead, OurBaseModelOut, PagedResponse, UserRead, BaseFilter
-from app.models import Order, OrderItem, Session
-from app.routers.error import add_error, get_error_detail
-from app.oauth2 import get_current_user
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, any_, literal, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
+from app.database import get_db, get_async_db
+from app.schemas import OrderBase, OrderRead, OurBaseModelOut, UserPrincipal, OrderFilter, OrderBatch, OrderBatchOut, OrderBatchResult
+from app.models import Order, OrderItem, Session, Product, User
+from app.routers.error import classify_error, add_error, register_error_keys
+from app.oauth2 import get_current_user, get_current_user_async
+from app.loaders import loader_options
+from app.serialization import paged_body, json_response
+from app.pagination import apply_page, split_page, get_next_cursor, is_cursor_mode, get_total_records, get_total_pages, invalidate_count
 from app.routers.session import get_active_session
+from app.orderExport import build_export_query, stream_order_export, FORMATS
+from app.enums import OrderStatus, OrderSort
+from app.salesSummary import record_orders
+from app.stock import lock_tracked_products, reserve_stock, reserved_quantity, reserve_order_stock, release_order_stock
+from app.httpCache import bump_version
 
 router = APIRouter(prefix="/orders", tags=["Orders"])
 
@@ -18,94 +33,273 @@ error_keys={
     "orders_session_id_fkey":{"message":"Session not found","status":404}
 }
 
+register_error_keys(error_keys)
+
+page_keys = {
+    OrderSort.CreatedOn: (Order.created_on, Order.id),
+    OrderSort.TotalAmount: (Order.total_amount, Order.id),
+}
+
+
+def product_categories(db: DbSession, product_ids) -> dict:
+    product_ids = list(set(product_ids))
+    return dict(db.execute(
+        select(Product.id, Product.category_id).where(Product.id == any_(literal(product_ids, ARRAY(Integer))))
+    ).all()) if product_ids else {}
+
+
+def order_totals(lines) -> dict:
+    # (quantity, unit_price) pairs -> the denormalized totals stored on the order row
+    lines = list(lines)
+    total = sum((quantity * unit_price for quantity, unit_price in lines), Decimal(0))
+    return {"total_amount": total.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP), "item_count": len(lines)}
+
+
 @router.post("/")
-def create_order(order: OrderBase, db: DbSession = Depends(get_db), current_user: UserRead = Depends(get_current_user)):
+def create_order(order: OrderBase, db: DbSession = Depends(get_db), current_user: UserPrincipal = Depends(get_current_user)):
     try:
         active_session = get_active_session(db,current_user.id)
+        reserved, short = reserve_stock(db, ((item.product_id, item.quantity) for item in order.items))
+        if short:
+            db.rollback()
+            return OurBaseModelOut(status=409, message=f"Insufficient stock for products: {', '.join(map(str, short))}")
+
         new_order = Order(
             buyer_id=order.buyer_id,
             buyer_phone=order.buyer_phone,
             buyer_address=order.buyer_address,
-            session_id=active_session.id
+            session_id=active_session.id,
+            **order_totals((item.quantity, item.unit_price) for item in order.items)
         )
     
         db.add(new_order)
         db.flush()
-        db.bulk_save_objects([OrderItem(order_id = new_order.id, product_id = item.product_id, quantity = item.quantity, unit_price = item.unit_price) for item in order.items])
+        categories = product_categories(db, (item.product_id for item in order.items))
+        reserved = set(reserved)
+        db.bulk_save_objects([OrderItem(order_id = new_order.id, product_id = item.product_id, quantity = item.quantity, unit_price = item.unit_price, category_id = categories.get(item.product_id), reserved_quantity = reserved_quantity(item.product_id, item.quantity, reserved)) for item in order.items])
+        record_orders(db, [new_order.id])
+        if reserved:
+            bump_version(db, "products")
         db.commit()
+        invalidate_count("orders")
         return OurBaseModelOut(status=201, message="Order created successfully")
 
     except Exception as e:
         db.rollback()
-        add_error(str(e),db,current_user.id)
-        error_detail = get_error_detail(str(e),error_keys)
-        return OurBaseModelOut(status=error_detail["status"], message=error_detail["message"])
+        error = classify_error(e)
+        add_error(error,current_user.id)
+        return OurBaseModelOut(status=error.status, message=error.message)
 
 
 
+@router.post("/batch")
+def create_orders_batch(batch: OrderBatch, db: DbSession = Depends(get_db), current_user: UserPrincipal = Depends(get_current_user)):
+    try:
+        active_session = get_active_session(db,current_user.id)
+        if not active_session:
+            return OurBaseModelOut(status=404, message="Session not found")
+
+        product_ids = list({item.product_id for entry in batch.orders for item in entry.items})
+        buyer_ids = list({entry.buyer_id for entry in batch.orders})
+        products = db.execute(
+            select(Product.id, Product.unit_price, Product.category_id).where(Product.id == any_(literal(product_ids, ARRAY(Integer))))
+        ).all() if product_ids else []
+        prices = {product.id: product.unit_price for product in products}
+        categories = {product.id: product.category_id for product in products}
+        known_buyers = set(db.scalars(
+            select(User.id).where(User.id == any_(literal(buyer_ids, ARRAY(Integer))))
+        ).all()) if buyer_ids else set()
+
+        results = [None] * len(batch.orders)
+        valid = []
+        for index, entry in enumerate(batch.orders):
+            missing = sorted({item.product_id for item in entry.items if item.product_id not in prices})
+            if not entry.items:
+                results[index] = OrderBatchResult(index=index, status=400, message="Order has no items")
+            elif entry.buyer_id not in known_buyers:
+                results[index] = OrderBatchResult(index=index, status=404, message="Buyer with this id not found")
+            elif missing:
+                results[index] = OrderBatchResult(index=index, status=404, message=f"Product not found: {', '.join(map(str, missing))}")
+            elif any(item.quantity <= 0 for item in entry.items):
+                results[index] = OrderBatchResult(index=index, status=400, message="Quantity must be greater than zero")
+            else:
+                valid.append((index, entry))
+
+        if valid:
+            # the batch reserves order by order in one transaction, so its tracked products are locked
+            # up front in id order; each order then reserves inside a savepoint it can roll back alone
+            lock_tracked_products(db, product_ids)
+            reservable = []
+            reserved_by_index = {}
+            for index, entry in valid:
+                savepoint = db.begin_nested()
+                reserved, short = reserve_stock(db, ((item.product_id, item.quantity) for item in entry.items), locked=True)
+                if short:
+                    savepoint.rollback()
+                    results[index] = OrderBatchResult(index=index, status=409, message=f"Insufficient stock for products: {', '.join(map(str, short))}")
+                else:
+                    savepoint.commit()
+                    reserved_by_index[index] = set(reserved)
+                    reservable.append((index, entry))
+            valid = reservable
+            stock_changed = any(reserved_by_index.values())
+
+        if valid:
+            order_ids = db.scalars(
+                insert(Order).returning(Order.id, sort_by_parameter_order=True),
+                [dict(
+                    buyer_id=entry.buyer_id,
+                    buyer_phone=entry.buyer_phone,
+                    buyer_address=entry.buyer_address,
+                    session_id=active_session.id,
+                    **order_totals((item.quantity, prices[item.product_id]) for item in entry.items)
+                ) for _, entry in valid],
+            ).all()
+            db.execute(insert(OrderItem), [
+                dict(order_id=order_id, product_id=item.product_id, quantity=item.quantity, unit_price=prices[item.product_id], category_id=categories[item.product_id],
+                     reserved_quantity=reserved_quantity(item.product_id, item.quantity, reserved_by_index[index]))
+                for (index, entry), order_id in zip(valid, order_ids) for item in entry.items
+            ])
+            record_orders(db, order_ids)
+            if stock_changed:
+                bump_version(db, "products")
+            db.commit()
+            invalidate_count("orders")
+            for (index, _), order_id in zip(valid, order_ids):
+                results[index] = OrderBatchResult(index=index, status=201, message="Order created successfully", order_id=order_id)
+
+        return OrderBatchOut(
+            status=201 if len(valid) == len(batch.orders) else 207,
+            message=f"{len(valid)} of {len(batch.orders)} orders created",
+            results=results
+        )
+
+    except Exception as e:
+        db.rollback()
+        error = classify_error(e)
+        add_error(error,current_user.id)
+        return OurBaseModelOut(status=error.status, message=error.message)
+
+
+@router.get("/export")
+def export_orders(date_from: Optional[datetime] = None, date_to: Optional[datetime] = None, status: Optional[List[OrderStatus]] = Query(None), format: str = "csv", current_user: UserPrincipal = Depends(get_current_user)):
+    try:
+        if format not in FORMATS:
+            return OurBaseModelOut(status=400, message=f"Unsupported format, expected one of: {', '.join(FORMATS)}")
+        if date_from and date_to and date_from >= date_to:
+            return OurBaseModelOut(status=400, message="date_from must be before date_to")
+
+        query = build_export_query(date_from, date_to, status)
+        return StreamingResponse(
+            stream_order_export(query, format),
+            media_type=FORMATS[format],
+            headers={"Content-Disposition": f'attachment; filename="orders.{format}"'}
+        )
+    except Exception as e:
+        error = classify_error(e)
+        add_error(error, current_user.id)
+        return OurBaseModelOut(status=error.status, message=error.message)
+
+
 @router.get("/{order_id}")
-def get_order(order_id: int, db: DbSession = Depends(get_db), current_user: UserRead = Depends(get_current_user)):
+def get_order(order_id: int, db: DbSession = Depends(get_db), current_user: UserPrincipal = Depends(get_current_user)):
    try:
-        order = db.query(Order).filter(Order.id == order_id).first()
+        order = db.query(Order).options(*loader_options(Order, OrderRead)).filter(Order.id == order_id).first()
         if not order:
             return OurBaseModelOut(status=404, message="Order not found")
         return OrderRead.model_validate(order)
    
    except Exception as e:
-       error_detail = get_error_detail(str(e),error_keys)
-       return OurBaseModelOut(status=error_detail["status"], message=error_detail["message"])
+       error = classify_error(e)
+       return OurBaseModelOut(status=error.status, message=error.message)
 
 
 @router.get("/")
-def get_orders(db: DbSession = Depends(get_db),filter: BaseFilter = Depends(), current_user: UserRead = Depends(get_current_user)):
+async def get_orders(db: AsyncSession = Depends(get_async_db),filter: OrderFilter = Depends(), current_user: UserPrincipal = Depends(get_current_user_async)):
     try:
-        query = db.query(Order)
-        total_records = query.count()
-        orders = query.offset((filter.page_number - 1) * filter.page_size).limit(filter.page_size).all()
-        total_pages = (total_records + filter.page_size - 1) // filter.page_size
-        return PagedResponse[OrderRead](
-            data=[OrderRead.model_validate(o) for o in orders],
-            page_number=filter.page_number,
+        keys = page_keys[filter.sort_by]
+        query = select(Order)
+        if filter.min_total is not None:
+            query = query.where(Order.total_amount >= filter.min_total)
+        if filter.max_total is not None:
+            query = query.where(Order.total_amount <= filter.max_total)
+
+        filtered = filter.min_total is not None or filter.max_total is not None
+        total_records = await get_total_records(db, query, Order, filtered=filtered) if filter.include_total else None
+        orders = (await db.execute(
+            apply_page(query.options(*loader_options(Order, OrderRead)), filter, keys)
+        )).scalars().all()
+        orders, has_more = split_page(orders, filter)
+        return json_response(paged_body(
+            OrderRead,
+            orders,
+            page_number=None if is_cursor_mode(filter) else filter.page_number,
             page_size=filter.page_size,
-            total_pages=total_pages,
+            total_pages=get_total_pages(total_records, filter),
             total_records=total_records,
+            next_cursor=get_next_cursor(orders, filter, keys, has_more),
+            has_more=has_more,
             status=200,
             message="Orders fetched"
-        )
+        ))
         
     except Exception as e:
-        error_detail=get_error_detail(str(e), error_keys)
-        return OurBaseModelOut(status=error_detail["status"], message=error_detail["message"])
+        error = classify_error(e)
+        return OurBaseModelOut(status=error.status, message=error.message)
 
 
 @router.put("/{order_id}")
-def update_order_status(order_id: int, status: str, db: DbSession = Depends(get_db), current_user: UserRead = Depends(get_current_user)):
+def update_order_status(order_id: int, status: str, db: DbSession = Depends(get_db), current_user: UserPrincipal = Depends(get_current_user)):
     try:
-        updated_rows = db.query(Order).filter(Order.id == order_id).update({"status": status})
-        if not updated_rows:
+        # lock the order first so the sales aggregates and stock move from the status it really had
+        current_status = db.scalar(select(Order.status).where(Order.id == order_id).with_for_update())
+        if not current_status:
             return OurBaseModelOut(status=404, message="Order not found")
-    
+
+        cancelled = OrderStatus.Cancelled
+        stock_changed = False
+        if status == cancelled.value and current_status != cancelled:
+            stock_changed = bool(release_order_stock(db, order_id))
+        elif status != cancelled.value and current_status == cancelled:
+            reserved, short = reserve_order_stock(db, order_id)
+            if short:
+                db.rollback()
+                return OurBaseModelOut(status=409, message=f"Insufficient stock for products: {', '.join(map(str, short))}")
+            stock_changed = bool(reserved)
+
+        record_orders(db, [order_id], -1)
+        db.query(Order).filter(Order.id == order_id).update({"status": status})
+        record_orders(db, [order_id])
+        if stock_changed:
+            bump_version(db, "products")
         db.commit()
         return OurBaseModelOut(status=200, message="Order updated successfully")
 
     except Exception as e:
         db.rollback()
-        add_error(str(e),db,current_user.id)
-        error_detail=get_error_detail(str(e), error_keys)
-        return OurBaseModelOut(status=error_detail["status"], message=error_detail["message"])
+        error = classify_error(e)
+        add_error(error,current_user.id)
+        return OurBaseModelOut(status=error.status, message=error.message)
 
 
 @router.delete("/{order_id}")
-def delete_order(order_id: int, db: DbSession = Depends(get_db), current_user: UserRead = Depends(get_current_user)):
+def delete_order(order_id: int, db: DbSession = Depends(get_db), current_user: UserPrincipal = Depends(get_current_user)):
     try:
-        order = db.query(Order).filter(Order.id == order_id).delete()
-        if not order:
+        current_status = db.scalar(select(Order.status).where(Order.id == order_id).with_for_update())
+        if not current_status:
             return OurBaseModelOut(status=404, message="Order not found")
+
+        restocked = release_order_stock(db, order_id) if current_status != OrderStatus.Cancelled else []
+        record_orders(db, [order_id], -1)
+        db.query(Order).filter(Order.id == order_id).delete()
+        if restocked:
+            bump_version(db, "products")
         db.commit()
+        invalidate_count("orders")
         return OurBaseModelOut(status=200, message="Order deleted successfully")
 
     except Exception as e:
         db.rollback()
-        add_error(str(e),db,current_user.id)
-        error_detail=get_error_detail(str(e), error_keys)
-        return OurBaseModelOut(status=error_detail["status"], message=error_detail["message"])
\ No newline at end of file
+        error = classify_error(e)
+        add_error(error,current_user.id)
+        return OurBaseModelOut(status=error.status, message=error.message)
\ No newline at end of file
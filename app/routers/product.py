@@ -1,72 +1,121 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, File, UploadFile
+from typing import Optional
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import Product
-from app.database import get_db
-from app.schemas import ProductCreate, ProductOut, ProductUpdate, OurBaseModelOut, PagedResponse, UserRead, BaseFilter
-from app.routers.error import get_error_detail,add_error
-from app.oauth2 import get_current_user
+from app.database import get_db, get_async_db
+from app.schemas import ProductCreate, ProductOut, ProductUpdate, OurBaseModelOut, UserPrincipal, BaseFilter
+from app.routers.error import classify_error, add_error, register_error_keys
+from app.oauth2 import get_current_user, get_current_user_async
+from app.loaders import loader_options, projected_select, nest_row
+from app.serialization import paged_body
+from app.search import apply_name_search
+from app.httpCache import CachedView, bump_version, load_versions, load_versions_async
+from app.catalogImport import import_products, detect_format, FORMATS
+from app.pagination import apply_page, split_page, get_next_cursor, is_cursor_mode, get_total_records, get_total_pages, invalidate_count
 
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
 error_keys={
     "products_pkey":{"message":"Product not found","status":404},
-    "products_category_id_fkey":{"message":"Category not found","status":404}
+    "products_category_id_fkey":{"message":"Category not found","status":404},
+    "products_name_key":{"message":"Product with this name already exists","status":400},
+    "products_stock_check":{"message":"Stock cannot be negative","status":400}
 }
 
+register_error_keys(error_keys)
+
+page_keys = (Product.id,)
+
+cache_tables = ("products", "categories")
+
 @router.post("/")
-def create_product(product: ProductCreate,db: Session = Depends(get_db), current_user: UserRead = Depends(get_current_user)):
+def create_product(product: ProductCreate,db: Session = Depends(get_db), current_user: UserPrincipal = Depends(get_current_user)):
    try:
         new_product = Product(**product.model_dump())
         db.add(new_product)
+        bump_version(db, "products")
         db.commit()
+        invalidate_count("products")
         return OurBaseModelOut(status=201,message="Product created successfully") 
    except Exception as e:
         db.rollback()
-        add_error(str(e),db,current_user.id)
-        error_detail = get_error_detail(str(e),error_keys)
-        return OurBaseModelOut(status=error_detail["status"], message=error_detail["message"])
+        error = classify_error(e)
+        add_error(error,current_user.id)
+        return OurBaseModelOut(status=error.status, message=error.message)
    
 
+@router.post("/import")
+def import_product_catalogue(file: UploadFile = File(...), format: Optional[str] = None, db: Session = Depends(get_db), current_user: UserPrincipal = Depends(get_current_user)):
+    try:
+        format = format or detect_format(file.filename, file.content_type)
+        if format not in FORMATS:
+            return OurBaseModelOut(status=400, message=f"Unsupported format, expected one of: {', '.join(FORMATS)}")
+
+        result = import_products(db, file.file, format)
+        if result.inserted or result.updated:
+            invalidate_count("products")
+        return result.model_copy(update={
+            "status": 201 if not result.failed else 207,
+            "message": f"{result.inserted} inserted, {result.updated} updated, {result.failed} failed"
+        })
+    except Exception as e:
+        db.rollback()
+        error = classify_error(e)
+        add_error(error, current_user.id)
+        return OurBaseModelOut(status=error.status, message=error.message)
+
+
 @router.get("/")
-def get_products(db: Session = Depends(get_db),filter: BaseFilter = Depends(), current_user: UserRead = Depends(get_current_user)):
+async def get_products(request: Request, db: AsyncSession = Depends(get_async_db),filter: BaseFilter = Depends(), current_user: UserPrincipal = Depends(get_current_user_async)):
     try:
-        query = db.query(Product)
+        view = CachedView(request, "products", await load_versions_async(db, cache_tables), filter)
+        if view.hit:
+            return view.hit
+
+        query = projected_select(Product, ProductOut)
         
-        if filter.name_substr:
-            query = query.filter(Product.name.ilike(f"%{filter.name_substr}%"))
-
-        total_records = query.count()
-        products= query.offset((filter.page_number - 1) * filter.page_size).limit(filter.page_size).all()
-        total_pages = (total_records + filter.page_size - 1) // filter.page_size
-        return PagedResponse[ProductOut](
-            data=[ProductOut.model_validate(p) for p in products],
-            page_number=filter.page_number,
+        query = await apply_name_search(db, query, Product.name, filter)
+
+        total_records = await get_total_records(db, query, Product, filtered=bool(filter.name_substr)) if filter.include_total else None
+        products = (await db.execute(apply_page(query, filter, page_keys))).all()
+        products, has_more = split_page(products, filter)
+        return view.store(paged_body(
+            ProductOut,
+            [nest_row(p) for p in products],
+            page_number=None if is_cursor_mode(filter) else filter.page_number,
             page_size=filter.page_size,
-            total_pages=total_pages,
+            total_pages=get_total_pages(total_records, filter),
             total_records=total_records,
+            next_cursor=get_next_cursor(products, filter, page_keys, has_more),
+            has_more=has_more,
             status=200,
             message="Products fetched"
-        )
+        ))
     except Exception as e:
-        error_detail=get_error_detail(str(e), error_keys)
-        return OurBaseModelOut(status=error_detail["status"], message=error_detail["message"])
+        error = classify_error(e)
+        return OurBaseModelOut(status=error.status, message=error.message)
 
 @router.get("/{product_id}")
-def get_product(product_id: int, db: Session = Depends(get_db), current_user: UserRead = Depends(get_current_user)):
+def get_product(product_id: int, request: Request, db: Session = Depends(get_db), current_user: UserPrincipal = Depends(get_current_user)):
     try:
-        product = db.query(Product).filter(Product.id == product_id).first()
+        view = CachedView(request, f"products/{product_id}", load_versions(db, cache_tables))
+        if view.hit:
+            return view.hit
+
+        product = db.query(Product).options(*loader_options(Product, ProductOut)).filter(Product.id == product_id).first()
 
         if not product:
             return OurBaseModelOut(status=404, message="Product not found")
         
-        return ProductOut.model_validate(product)      
+        return view.store(ProductOut.model_validate(product))
     except Exception as e:      
-        error_detail=get_error_detail(str(e), error_keys)
-        return OurBaseModelOut(status=error_detail["status"], message=error_detail["message"])
+        error = classify_error(e)
+        return OurBaseModelOut(status=error.status, message=error.message)
 
 @router.put("/{product_id}")
-def update_product(product_id: int,product_update: ProductUpdate,db: Session = Depends(get_db), current_user: UserRead = Depends(get_current_user)):
+def update_product(product_id: int,product_update: ProductUpdate,db: Session = Depends(get_db), current_user: UserPrincipal = Depends(get_current_user)):
    try:
         product = db.query(Product).filter(Product.id == product_id).first()
         
@@ -76,16 +125,17 @@ def update_product(product_id: int,product_update: ProductUpdate,db: Session = D
         for key, value in product_update.model_dump(exclude_unset=True).items():
             setattr(product, key, value)
 
+        bump_version(db, "products")
         db.commit()
         return OurBaseModelOut(status=200, message="Product updated successfully")
    except Exception as e:
         db.rollback()
-        add_error(str(e),db,current_user.id)
-        error_detail = get_error_detail(str(e), error_keys)
-        return OurBaseModelOut(status=error_detail["status"], message=error_detail["message"])
+        error = classify_error(e)
+        add_error(error,current_user.id)
+        return OurBaseModelOut(status=error.status, message=error.message)
 
 @router.delete("/{product_id}")
-def delete_product(product_id: int,db: Session = Depends(get_db), current_user: UserRead = Depends(get_current_user)):
+def delete_product(product_id: int,db: Session = Depends(get_db), current_user: UserPrincipal = Depends(get_current_user)):
     try:
         query = db.query(Product).filter(Product.id == product_id)
         product = query.first()
@@ -94,10 +144,12 @@ def delete_product(product_id: int,db: Session = Depends(get_db), current_user:
             return OurBaseModelOut(status=404, message="Product not found")
 
         query.delete()
+        bump_version(db, "products")
         db.commit()
+        invalidate_count("products")
         return OurBaseModelOut(status=200, message="Product deleted successfully")
     except Exception as e:
         db.rollback()
-        add_error(str(e),db,current_user.id)
-        error_detail = get_error_detail(str(e), error_keys)
-        return OurBaseModelOut(status=error_detail["status"], message=error_detail["message"])
+        error = classify_error(e)
+        add_error(error,current_user.id)
+        return OurBaseModelOut(status=error.status, message=error.message)
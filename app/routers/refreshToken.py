@@ -5,6 +5,7 @@ from app.models import RefreshToken, BlacklistToken
 from app.database import get_db
 from app.schemas import OurBaseModelOut
 from app.oauth2 import create_access_token
+from app.revocation import revocation_index
 from datetime import datetime, timedelta, timezone
 import hashlib
 import uuid
@@ -27,14 +28,15 @@ def refresh_token(request: Request, response: Response, db: Session = Depends(ge
         if db_token.expires_at < datetime.now(timezone.utc):
             return OurBaseModelOut(status=401, message="Refresh token expired")
 
-        if db.query(BlacklistToken).filter(BlacklistToken.token_hash == token_hash).first():
+        if revocation_index.might_be_revoked(token_hash) and db.query(BlacklistToken.id).filter(BlacklistToken.token_hash == token_hash).first():
             return OurBaseModelOut(status=401, message="Refresh token is blacklisted")
 
         db.add(BlacklistToken(token_hash=db_token.token_hash, session_id=db_token.session_id, expires_at=db_token.expires_at))
+        revocation_index.add(db_token.token_hash, db_token.expires_at)
         db.delete(db_token)
 
         new_refresh_token = create_refresh_token(db, db_token.session_id)
-        access_token = create_access_token({"id": db_token.session.user.id, "role": db_token.session.user.role.value})
+        access_token = create_access_token({"id": db_token.session.user.id, "role": db_token.session.user.role.value, "sid": db_token.session_id})
 
         response.set_cookie(
            key="refresh_token",
@@ -78,6 +80,8 @@ def blacklisted_refresh_tokens(db:Session,session_id:int):
         refresh_tokens = db.query(RefreshToken).filter(RefreshToken.session_id == session_id).all()
         if refresh_tokens:
              db.bulk_save_objects([BlacklistToken(token_hash=t.token_hash, session_id=t.session_id, expires_at=t.expires_at) for t in refresh_tokens])
+             for t in refresh_tokens:
+                 revocation_index.add(t.token_hash, t.expires_at)
              db.query(RefreshToken).filter_by(session_id=session_id).delete(synchronize_session=False)
         db.flush()
         return True
@@ -1,19 +1,17 @@
 from app.models import Session
 from sqlalchemy.orm import Session as DbSession
-from sqlalchemy import desc
+from sqlalchemy import desc, update, bindparam
 from fastapi import Request
-from app.utils import get_location_from_ip
-import json
 from app.schemas import SessionBase
 from datetime import datetime,timezone
+from threading import Lock
+from app.database import SessionLocal
 
 def create_session(db: DbSession, user_id: int, request: Request):
     try:
         ip_address = request.client.host if request.client else None
         user_agent = request.headers.get("user-agent")
-        location = get_location_from_ip(ip_address)
-        location_str = json.dumps(location) if location else None
-        new_session = Session(user_id=user_id, ip_address=ip_address, user_agent=user_agent, location=location_str)
+        new_session = Session(user_id=user_id, ip_address=ip_address, user_agent=user_agent)
         db.add(new_session)
         db.flush()
         return SessionBase.model_validate(new_session)
@@ -30,11 +28,53 @@ def get_active_session(db: DbSession, user_id: int):
     except Exception as e:
         return None
 
-def update_last_activity(db: DbSession, user_id: int):
+def get_latest_session_id(db: DbSession, user_id: int):
     try:
-        session_db = db.query(Session).filter(Session.user_id == user_id).order_by(desc(Session.created_at)).first()
-        session_db.last_activity_at = datetime.now(timezone.utc)
-        db.commit()
-        return True
+        return db.query(Session.id).filter(Session.user_id == user_id).order_by(desc(Session.created_at)).limit(1).scalar()
     except Exception as e:
-        return None
\ No newline at end of file
+        return None
+
+
+class ActivityTracker:
+    def __init__(self):
+        self._pending: dict[int, datetime] = {}
+        self._lock = Lock()
+
+    def touch(self, session_id: int):
+        if session_id is None:
+            return
+        with self._lock:
+            self._pending[session_id] = datetime.now(timezone.utc)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        db = SessionLocal()
+        try:
+            stmt = (
+                update(Session)
+                .where(Session.id == bindparam("b_id"))
+                .values(last_activity_at=bindparam("b_last_activity_at"))
+                .execution_options(synchronize_session=False)
+            )
+            db.connection().execute(stmt, [{"b_id": sid, "b_last_activity_at": ts} for sid, ts in pending.items()])
+            db.commit()
+            return len(pending)
+        except Exception as e:
+            db.rollback()
+            with self._lock:
+                for sid, ts in pending.items():
+                    self._pending.setdefault(sid, ts)
+            return 0
+        finally:
+            db.close()
+
+
+activity_tracker = ActivityTracker()
+
+
+def update_last_activity(session_id: int):
+    activity_tracker.touch(session_id)
+    return True
\ No newline at end of file
@@ -1,12 +1,16 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
-from app.models import User,Token
-from app.schemas import UserCreate, UserRead, UserUpdate, OurBaseModelOut,MailData
+from sqlalchemy import select, func
+from app.models import User,Token,Session as UserSession
+from app.schemas import UserCreate, UserRead, UserUpdate, OurBaseModelOut,MailData, UserPrincipal, SessionBase, BaseFilter
 from app.database import get_db
-from app.oauth2 import hash_password, get_current_user
-from app.utils import send_mail
+from app.oauth2 import hash_password, get_current_user, invalidate_principal
+from app.outbox import enqueue_mail
 import uuid
-from app.routers.error import get_error_detail,add_error
+from app.routers.error import classify_error, add_error, register_error_keys
+from app.loaders import projected_select, nest_row
+from app.serialization import paged_body, json_response
+from app.pagination import apply_page, split_page, get_next_cursor, is_cursor_mode, get_total_pages
 
 router = APIRouter(prefix="/users", tags=["users"])
 
@@ -15,8 +19,12 @@ error_keys = {
     "ix_users_email": {"message": "Email already exists", "status": 400}
 }
 
+register_error_keys(error_keys)
+
+session_page_keys = (UserSession.id,)
+
 @router.post("/")
-async def create_user(user: UserCreate, db: Session = Depends(get_db)):
+def create_user(user: UserCreate, db: Session = Depends(get_db)):
     try:
         db_user = User(
             first_name=user.first_name,
@@ -30,7 +38,7 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
         db_token = Token(token=uuid.uuid4(),user_id=db_user.id)
         db.add(db_token)
 
-        await send_mail(MailData(
+        enqueue_mail(db, MailData(
             emails=[db_user.email],
             body={"name": f"{db_user.first_name} {db_user.last_name}","code":db_token.token},
             template="confirm_account.html",
@@ -42,12 +50,12 @@ async def create_user(user: UserCreate, db: Session = Depends(get_db)):
 
     except Exception as e:
         db.rollback()
-        add_error(str(e),db)
-        error_detail=get_error_detail(str(e), error_keys)
-        return OurBaseModelOut(status=error_detail["status"], message=error_detail["message"])
+        error = classify_error(e)
+        add_error(error)
+        return OurBaseModelOut(status=error.status, message=error.message)
 
 @router.get("/{user_id}")
-def read_user(user_id: int, db: Session = Depends(get_db), current_user: UserRead = Depends(get_current_user)):
+def read_user(user_id: int, db: Session = Depends(get_db), current_user: UserPrincipal = Depends(get_current_user)):
     try:
         user = db.query(User).filter(User.id == user_id).first()
 
@@ -59,8 +67,29 @@ def read_user(user_id: int, db: Session = Depends(get_db), current_user: UserRea
     except Exception as e:
         return OurBaseModelOut(status=400, message="An error occurred while fetching user details")
 
+@router.get("/{user_id}/sessions")
+def read_user_sessions(user_id: int, db: Session = Depends(get_db), filter: BaseFilter = Depends(), current_user: UserPrincipal = Depends(get_current_user)):
+    try:
+        query = projected_select(UserSession, SessionBase).where(UserSession.user_id == user_id)
+        total_records = db.scalar(select(func.count()).select_from(query.subquery())) if filter.include_total else None
+        sessions, has_more = split_page(db.execute(apply_page(query, filter, session_page_keys)).all(), filter)
+        return json_response(paged_body(
+            SessionBase,
+            [nest_row(s) for s in sessions],
+            page_number=None if is_cursor_mode(filter) else filter.page_number,
+            page_size=filter.page_size,
+            total_pages=get_total_pages(total_records, filter),
+            total_records=total_records,
+            next_cursor=get_next_cursor(sessions, filter, session_page_keys, has_more),
+            has_more=has_more,
+            status=200,
+            message="Sessions fetched"
+        ))
+    except Exception as e:
+        return OurBaseModelOut(status=400, message="An error occurred while fetching user sessions")
+
 @router.put("/{user_id}")
-def update_user(user_id: int, user: UserUpdate, db: Session = Depends(get_db), current_user: UserRead = Depends(get_current_user)):
+def update_user(user_id: int, user: UserUpdate, db: Session = Depends(get_db), current_user: UserPrincipal = Depends(get_current_user)):
     try:
         db_user = db.query(User).filter(User.id == user_id).first()
         if not db_user:
@@ -71,17 +100,18 @@ def update_user(user_id: int, user: UserUpdate, db: Session = Depends(get_db), c
         
         db.commit()
         db.refresh(db_user)
+        invalidate_principal(user_id)
 
         return OurBaseModelOut(status=200, message="User updated successfully")
     
     except Exception as e:
         db.rollback()
-        add_error(str(e),db,current_user.id)
-        error_detail=get_error_detail(str(e), error_keys)
-        return OurBaseModelOut(status=error_detail["status"], message=error_detail["message"])
+        error = classify_error(e)
+        add_error(error,current_user.id)
+        return OurBaseModelOut(status=error.status, message=error.message)
 
 @router.delete("/{user_id}")
-def delete_user(user_id: int, db: Session = Depends(get_db), current_user: UserRead = Depends(get_current_user)):
+def delete_user(user_id: int, db: Session = Depends(get_db), current_user: UserPrincipal = Depends(get_current_user)):
     try:
         deleted_row = db.query(User).filter(User.id == user_id).delete()
 
@@ -89,9 +119,10 @@ def delete_user(user_id: int, db: Session = Depends(get_db), current_user: UserR
             return OurBaseModelOut(status=404,message="User not found")
         
         db.commit()
+        invalidate_principal(user_id)
         return OurBaseModelOut(status=200, message="User deleted successfully")
     except Exception as e:
         db.rollback()
-        add_error(str(e),db,current_user.id)
-        error_detail=get_error_detail(str(e), error_keys)
-        return OurBaseModelOut(status=error_detail["status"], message=error_detail["message"])
\ No newline at end of file
+        error = classify_error(e)
+        add_error(error,current_user.id)
+        return OurBaseModelOut(status=error.status, message=error.message)
\ No newline at end of file
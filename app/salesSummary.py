@@ -0,0 +1,118 @@
+from datetime import date, datetime, timedelta
+from typing import Sequence
+from sqlalchemy import select, delete, func, distinct, literal, any_, Integer
+from sqlalchemy.dialects.postgresql import insert, ARRAY
+from sqlalchemy.orm import Session as DbSession
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Order, OrderItem, Product, DailySales, DailyProductSales
+
+MEASURES = ("order_count", "quantity", "revenue")
+
+
+def _sales_day():
+    return func.date(func.timezone(settings.analytics_timezone, Order.created_on))
+
+
+def _day_start(day: date):
+    # midnight of `day` in the analytics timezone, as a timestamptz comparable with orders.created_on
+    return func.timezone(settings.analytics_timezone, literal(datetime.combine(day, datetime.min.time())))
+
+
+def _daily_rows(where, sign: int):
+    day = _sales_day()
+    items = (
+        select(
+            OrderItem.order_id,
+            func.sum(OrderItem.quantity).label("quantity"),
+            func.sum(OrderItem.quantity * OrderItem.unit_price).label("revenue"),
+        )
+        .where(OrderItem.order_id.in_(select(Order.id).where(where)))
+        .group_by(OrderItem.order_id)
+        .subquery()
+    )
+    return (
+        select(
+            day,
+            Order.status,
+            sign * func.count(Order.id),
+            sign * func.coalesce(func.sum(items.c.quantity), 0),
+            sign * func.coalesce(func.sum(items.c.revenue), 0),
+        )
+        .select_from(Order)
+        .outerjoin(items, items.c.order_id == Order.id)
+        .where(where)
+        .group_by(day, Order.status)
+        .order_by(day, Order.status)
+    )
+
+
+def _product_rows(where, sign: int):
+    # the category recorded on the item, not the product's current one: the -1 of a later change
+    # must land on the row the +1 went to
+    day = _sales_day()
+    category_id = func.coalesce(OrderItem.category_id, Product.category_id)
+    return (
+        select(
+            day,
+            OrderItem.product_id,
+            category_id,
+            Order.status,
+            sign * func.count(distinct(Order.id)),
+            sign * func.sum(OrderItem.quantity),
+            sign * func.sum(OrderItem.quantity * OrderItem.unit_price),
+        )
+        .select_from(Order)
+        .join(OrderItem, OrderItem.order_id == Order.id)
+        .join(Product, Product.id == OrderItem.product_id)
+        .where(where)
+        .group_by(day, OrderItem.product_id, category_id, Order.status)
+        .order_by(day, OrderItem.product_id, category_id, Order.status)
+    )
+
+
+def _upsert(model, keys: Sequence[str], rows):
+    # additive upsert: concurrent writers only ever add deltas, rows are locked in key order
+    statement = insert(model).from_select([*keys, *MEASURES], rows)
+    return statement.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={measure: getattr(model, measure) + getattr(statement.excluded, measure) for measure in MEASURES},
+    )
+
+
+def _apply(db: DbSession, where, sign: int):
+    db.execute(_upsert(DailySales, ("day", "status"), _daily_rows(where, sign)))
+    db.execute(_upsert(DailyProductSales, ("day", "product_id", "category_id", "status"), _product_rows(where, sign)))
+
+
+def record_orders(db: DbSession, order_ids: Sequence[int], sign: int = 1):
+    # runs inside the caller's transaction, before its commit: +1 once the order and its items are
+    # written, -1 before they change or disappear
+    if not order_ids:
+        return
+    _apply(db, Order.id == any_(literal(list(order_ids), ARRAY(Integer))), sign)
+
+
+def rebuild_sales(db: DbSession, date_from: date, date_to: date) -> int:
+    # one day per transaction so a long range never holds locks on the aggregates for long
+    days = 0
+    day = date_from
+    while day < date_to:
+        next_day = day + timedelta(days=1)
+        db.execute(delete(DailySales).where(DailySales.day == day))
+        db.execute(delete(DailyProductSales).where(DailyProductSales.day == day))
+        _apply(db, (Order.created_on >= _day_start(day)) & (Order.created_on < _day_start(next_day)), 1)
+        db.commit()
+        days += 1
+        day = next_day
+    return days
+
+
+def rebuild_sales_in_background(date_from: date, date_to: date):
+    db = SessionLocal()
+    try:
+        rebuild_sales(db, date_from, date_to)
+    except Exception as e:
+        db.rollback()
+    finally:
+        db.close()
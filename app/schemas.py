@@ -1,10 +1,10 @@
 from __future__ import annotations
 from decimal import Decimal
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, field_validator
 from typing import Any, Dict, List, Optional,TypeVar,Generic
-from datetime import datetime
+from datetime import date, datetime
 import json
-from app.enums import Role, AccountStatus
+from app.enums import Role, AccountStatus, PaginationMode, SearchMode, OrderSort
 
 T=TypeVar("T")
 
@@ -22,11 +22,22 @@ class PagedResponse(OurBaseModelOut,Generic[T]):
     page_size: Optional[int] = None
     total_pages: Optional[int] = None
     total_records: Optional[int] = None
+    next_cursor: Optional[str] = None
+    has_more: Optional[bool] = None
 
 class BaseFilter(OurBaseModel):
     name_substr: Optional[str]= None
+    search_mode: SearchMode = SearchMode.Substring
     page_size: Optional[int] = 10
     page_number: Optional[int] = 1
+    pagination: PaginationMode = PaginationMode.Page
+    cursor: Optional[str] = None
+    include_total: bool = True
+
+class OrderFilter(BaseFilter):
+    min_total: Optional[Decimal] = None
+    max_total: Optional[Decimal] = None
+    sort_by: OrderSort = OrderSort.CreatedOn
 
 class UserBase(OurBaseModel):
     first_name: str
@@ -48,7 +59,11 @@ class UserRead(UserBase):
     id: int
     role: Role
     status: AccountStatus
-    sessions: Optional[List[SessionBase]] = []
+
+class UserPrincipal(OurBaseModel):
+    id: int
+    role: Role
+    status: AccountStatus
 
 class CategoryBase(OurBaseModel):
     name: str
@@ -60,7 +75,7 @@ class CategoryCreate(CategoryBase):
 class CategoryRead(CategoryBase):
     id: int
     products: Optional[List[ProductRead]] = []
-    image_link:str
+    image_link: Optional[str] = None
 
 class CategoryUpdate(OurBaseModel):
     name: Optional[str] = None
@@ -68,12 +83,13 @@ class CategoryUpdate(OurBaseModel):
 
 class CategoryOut(CategoryBase):
     id: int
-    image_link: str
+    image_link: Optional[str] = None
 
 class ProductBase(OurBaseModel):
     name: str
     unit_price: Decimal
     category_id: int
+    stock: Optional[Decimal] = None
 
 class ProductCreate(ProductBase):
     pass
@@ -90,8 +106,26 @@ class ProductOut(ProductBase):
     id: int
     category: CategoryOut  
 
+class ProductImportRow(OurBaseModel):
+    name: str
+    unit_price: Decimal
+    category: Optional[str] = None
+    category_id: Optional[int] = None
+
+class ProductImportError(OurBaseModel):
+    line: int
+    message: str
+
+class ProductImportOut(OurBaseModelOut):
+    inserted: int = 0
+    updated: int = 0
+    failed: int = 0
+    errors: List[ProductImportError] = []
+    errors_truncated: bool = False
+
 class TokenData(OurBaseModel):
     id: int = None
+    sid: Optional[int] = None
 
 class OrderItemBase(OurBaseModel):
     product_id: int
@@ -108,12 +142,58 @@ class OrderBase(OurBaseModel):
     buyer_address: str
     items: List[OrderItemBase]
 
+class OrderBatchItem(OurBaseModel):
+    product_id: int
+    quantity: Decimal
+
+class OrderBatchEntry(OurBaseModel):
+    buyer_id: int
+    buyer_phone: int
+    buyer_address: str
+    items: List[OrderBatchItem]
+
+class OrderBatch(OurBaseModel):
+    orders: List[OrderBatchEntry]
+
+class OrderBatchResult(OurBaseModel):
+    index: int
+    status: int
+    message: str
+    order_id: Optional[int] = None
+
+class OrderBatchOut(OurBaseModelOut):
+    results: List[OrderBatchResult] = []
+
 class OrderRead(OrderBase):
     id: int
     status: str
     created_on: datetime
+    total_amount: Decimal
+    item_count: int
     items: List[OrderItemRead]
 
+class DailySalesRead(OurBaseModel):
+    day: date
+    order_count: int
+    quantity: Decimal
+    revenue: Decimal
+
+class ProductSalesRead(OurBaseModel):
+    product_id: int
+    product_name: Optional[str] = None
+    order_count: int
+    quantity: Decimal
+    revenue: Decimal
+
+class CategorySalesRead(OurBaseModel):
+    category_id: int
+    category_name: Optional[str] = None
+    quantity: Decimal
+    revenue: Decimal
+
+class AnalyticsResponse(OurBaseModelOut,Generic[T]):
+    data: List[T] = []
+
 class MailData(OurBaseModel):
     emails: List[EmailStr]
     body: Dict[str, Any]
@@ -152,9 +232,10 @@ class SessionBase(OurBaseModel):
     is_active: bool = True
     user_id: int
 
-    class Config:
-        @staticmethod
-        def json_schema_extra(obj):
-            if isinstance(obj, dict) and "location" in obj and obj["location"]:
-                obj["location"] = json.loads(obj["location"])
+    @field_validator("location", mode="before")
+    @classmethod
+    def parse_location(cls, value):
+        if isinstance(value, str):
+            return json.loads(value)
+        return value
 
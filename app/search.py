@@ -0,0 +1,27 @@
+from sqlalchemy import func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.enums import SearchMode
+
+# Similarity search needs the pg_trgm extension (see migration "add trigram name indexes").
+# When it is not installed, Similarity mode falls back to the plain ILIKE substring filter,
+# ordered by the pagination keys instead of by rank.
+_trgm_available = None
+
+
+async def has_trgm(db: AsyncSession) -> bool:
+    global _trgm_available
+    if _trgm_available is None:
+        _trgm_available = bool(await db.scalar(text("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")))
+    return _trgm_available
+
+
+def is_ranked(filter) -> bool:
+    return bool(filter.name_substr) and filter.search_mode == SearchMode.Similarity
+
+
+async def apply_name_search(db: AsyncSession, query, column, filter):
+    if not filter.name_substr:
+        return query
+    if is_ranked(filter) and await has_trgm(db):
+        return query.where(column.op("%")(filter.name_substr)).order_by(func.similarity(column, filter.name_substr).desc())
+    return query.where(column.ilike(f"%{filter.name_substr}%"))
@@ -0,0 +1,40 @@
+from functools import lru_cache
+from typing import Any, List, Optional, Sequence
+from fastapi import Response
+from pydantic import TypeAdapter
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+@lru_cache(maxsize=None)
+def list_adapter(schema) -> TypeAdapter:
+    return TypeAdapter(List[schema])
+
+
+def _dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":")).encode()
+
+
+def dump_rows(schema, rows: Sequence) -> bytes:
+    # one validation pass (ORM objects or projected dicts) and a Rust-side JSON dump, no FastAPI re-encoding
+    adapter = list_adapter(schema)
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+
+def paged_body(schema, rows: Sequence, **meta) -> bytes:
+    # same document as PagedResponse[schema]; the (small) envelope is encoded separately and the rows spliced in
+    return b'{"data":' + dump_rows(schema, rows) + b"," + _dumps(meta)[1:]
+
+
+class JSONBytesResponse(Response):
+    media_type = "application/json"
+
+
+def json_response(body: bytes, headers: Optional[dict] = None) -> JSONBytesResponse:
+    return JSONBytesResponse(content=body, headers=headers)
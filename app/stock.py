@@ -0,0 +1,123 @@
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, Iterable, List, Tuple
+from sqlalchemy import select, update, values, column, literal, any_, func, case, Integer, Numeric
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.orm import Session as DbSession
+from app.models import Product, OrderItem
+
+# products.stock is NULL for products whose stock is not tracked; those are never reserved,
+# restocked or locked by the statements below
+
+
+def _quantities(lines: Iterable[Tuple[int, Decimal]]) -> Dict[int, Decimal]:
+    quantities = defaultdict(Decimal)
+    for product_id, quantity in lines:
+        quantities[product_id] += quantity
+    return dict(quantities)
+
+
+def _delta(quantities: Dict[int, Decimal]):
+    return values(column("id", Integer), column("quantity", Numeric), name="delta").data(sorted(quantities.items()))
+
+
+def lock_tracked_products(db: DbSession, product_ids: Iterable[int]):
+    # an UPDATE does not lock its rows in any guaranteed order: taking the locks here, in id
+    # order, first is what keeps concurrent reservations over the same products deadlock-free
+    ids = sorted(set(product_ids))
+    if ids:
+        db.execute(
+            select(Product.id)
+            .where(Product.id == any_(literal(ids, ARRAY(Integer))), Product.stock.is_not(None))
+            .order_by(Product.id)
+            .with_for_update()
+        )
+
+
+def reserve_stock(db: DbSession, lines: Iterable[Tuple[int, Decimal]], locked: bool = False) -> Tuple[List[int], List[int]]:
+    # the conditional UPDATE does the check; returns (reserved ids, short ids). Nothing is undone
+    # here when some products are short: the caller rolls back (or to a savepoint)
+    quantities = _quantities(lines)
+    if not quantities:
+        return [], []
+    if not locked:
+        lock_tracked_products(db, quantities)
+    delta = _delta(quantities)
+    reserved = db.scalars(
+        update(Product)
+        .where(Product.id == delta.c.id, Product.stock >= delta.c.quantity)
+        .values(stock=Product.stock - delta.c.quantity)
+        .returning(Product.id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    missing = sorted(set(quantities) - set(reserved))
+    if not missing:
+        return reserved, []
+    # not reserved: either short, or untracked / unknown (which are not an error here)
+    short = db.scalars(
+        select(Product.id)
+        .where(Product.id == any_(literal(missing, ARRAY(Integer))), Product.stock.is_not(None))
+        .order_by(Product.id)
+    ).all()
+    return reserved, short
+
+
+def order_lines(db: DbSession, order_id: int) -> List[Tuple[int, Decimal]]:
+    return db.execute(
+        select(OrderItem.product_id, func.sum(OrderItem.quantity))
+        .where(OrderItem.order_id == order_id)
+        .group_by(OrderItem.product_id)
+    ).all()
+
+
+def reserved_lines(db: DbSession, order_id: int) -> List[Tuple[int, Decimal]]:
+    return db.execute(
+        select(OrderItem.product_id, func.sum(OrderItem.reserved_quantity))
+        .where(OrderItem.order_id == order_id, OrderItem.reserved_quantity > 0)
+        .group_by(OrderItem.product_id)
+    ).all()
+
+
+def reserved_quantity(product_id: int, quantity: Decimal, reserved: Iterable[int]) -> Decimal:
+    # what an order item took from stock: all of it for a tracked product, nothing otherwise
+    return quantity if product_id in reserved else Decimal(0)
+
+
+def restock(db: DbSession, lines: Iterable[Tuple[int, Decimal]]) -> List[int]:
+    quantities = _quantities(lines)
+    if not quantities:
+        return []
+    lock_tracked_products(db, quantities)
+    delta = _delta(quantities)
+    return db.scalars(
+        update(Product)
+        .where(Product.id == delta.c.id, Product.stock.is_not(None))
+        .values(stock=Product.stock + delta.c.quantity)
+        .returning(Product.id)
+        .execution_options(synchronize_session=False)
+    ).all()
+
+
+def reserve_order_stock(db: DbSession, order_id: int) -> Tuple[List[int], List[int]]:
+    # takes an existing order's quantities again (e.g. it leaves Cancelled) and records them on its items
+    reserved, short = reserve_stock(db, order_lines(db, order_id))
+    if not short:
+        db.execute(
+            update(OrderItem)
+            .where(OrderItem.order_id == order_id)
+            .values(reserved_quantity=case((OrderItem.product_id.in_(reserved), OrderItem.quantity), else_=0))
+            .execution_options(synchronize_session=False)
+        )
+    return reserved, short
+
+
+def release_order_stock(db: DbSession, order_id: int) -> List[int]:
+    # gives back only what the order's items recorded as reserved, never more
+    restocked = restock(db, reserved_lines(db, order_id))
+    db.execute(
+        update(OrderItem)
+        .where(OrderItem.order_id == order_id, OrderItem.reserved_quantity > 0)
+        .values(reserved_quantity=0)
+        .execution_options(synchronize_session=False)
+    )
+    return restocked
@@ -0,0 +1,55 @@
+"""Password verification throughput behind POST /auth/login.
+
+bcrypt verification is the CPU-bound part of a login; this drives PasswordPool the
+way the login route does (one verify_and_update per request, from many request
+threads) for each combination of cost factor and pool size.
+
+Run from the repository root with the application settings available (.env):
+
+    python -m benchmarks.login_throughput --rounds 10 12 --pool-sizes 0 2 4 --threads 16 --logins 200
+"""
+from concurrent.futures import ThreadPoolExecutor
+import argparse
+import time
+from app.passwords import PasswordPool, PasswordPoolBusy, build_context
+
+
+def run(rounds: int, pool_size: int, threads: int, logins: int) -> dict:
+    hashed = build_context(rounds).hash("correct horse")
+    pool = PasswordPool(pool_size, max_pending=threads, rounds=rounds)
+    pool.verify_and_update("correct horse", hashed)  # start the worker processes outside the timing
+    busy = 0
+
+    def login(_):
+        nonlocal busy
+        try:
+            verified, _ = pool.verify_and_update("correct horse", hashed)
+            assert verified
+        except PasswordPoolBusy:
+            busy += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(login, range(logins)))
+    elapsed = time.perf_counter() - started
+    pool.shutdown()
+    return {"rounds": rounds, "pool_size": pool_size, "logins_per_sec": (logins - busy) / elapsed, "busy": busy}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 12])
+    parser.add_argument("--pool-sizes", type=int, nargs="+", default=[0, 2, 4])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--logins", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'rounds':>6} {'pool':>5} {'logins/s':>10} {'busy':>6}")
+    for rounds in args.rounds:
+        for pool_size in args.pool_sizes:
+            result = run(rounds, pool_size, args.threads, args.logins)
+            print(f"{result['rounds']:>6} {result['pool_size']:>5} {result['logins_per_sec']:>10.1f} {result['busy']:>6}")
+
+
+if __name__ == "__main__":
+    main()
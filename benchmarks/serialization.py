@@ -0,0 +1,78 @@
+"""Paged list serialization: PagedResponse + FastAPI encoding vs cached TypeAdapter.
+
+"before" is what the list routes did originally: model_validate every ORM row, build
+PagedResponse[OrderRead], and let FastAPI run jsonable_encoder + JSONResponse on it.
+"after" is paged_body(): one TypeAdapter validation pass and a pydantic-core JSON dump.
+Rows are attribute objects shaped like Order -> items -> product -> category.
+No database or settings are needed:
+
+    python -m benchmarks.serialization --page-size 100 --pages 200
+"""
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+import argparse
+import json
+import time
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.schemas import OrderRead, PagedResponse
+from app.serialization import paged_body
+
+META = dict(page_number=1, page_size=None, total_pages=10, total_records=1000, next_cursor=None, has_more=True, status=200, message="Orders fetched")
+
+
+def make_rows(count: int, items: int):
+    category = SimpleNamespace(id=1, name="Analgesics", description="Pain relief", image_link=None)
+    rows = []
+    for i in range(count):
+        order_items = [
+            SimpleNamespace(
+                id=i * items + j,
+                product_id=j,
+                quantity=Decimal("2.000"),
+                unit_price=Decimal("4.50"),
+                product=SimpleNamespace(id=j, name=f"Product {j}", unit_price=Decimal("4.50"), category_id=1, stock=None, category=category),
+            )
+            for j in range(items)
+        ]
+        rows.append(SimpleNamespace(
+            id=i, buyer_id=1, buyer_phone=12345678, buyer_address="1 Main St", status="Paid",
+            created_on=datetime.now(timezone.utc), total_amount=Decimal("9.00") * items, item_count=items, items=order_items,
+        ))
+    return rows
+
+
+def before(rows, meta):
+    response = PagedResponse[OrderRead](data=[OrderRead.model_validate(o) for o in rows], **meta)
+    return JSONResponse(jsonable_encoder(response)).body
+
+
+def after(rows, meta):
+    return paged_body(OrderRead, rows, **meta)
+
+
+def measure(func, rows, meta, pages: int) -> float:
+    started = time.perf_counter()
+    for _ in range(pages):
+        func(rows, meta)
+    return pages * len(rows) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--items", type=int, default=3, help="order items per order")
+    parser.add_argument("--pages", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = make_rows(args.page_size, args.items)
+    meta = {**META, "page_size": args.page_size}
+    assert json.loads(before(rows, meta)) == json.loads(after(rows, meta))
+
+    for name, func in (("before (PagedResponse + jsonable_encoder)", before), ("after (paged_body)", after)):
+        print(f"{name:<42} {measure(func, rows, meta, args.pages):>12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""Concurrent POST /orders/ against a few hot products.
+
+Seeds a throwaway user, session, category and --products products holding --stock
+units each, then fires --orders orders at them from --concurrency concurrent
+clients. Every order asks for --quantity of a random, shuffled subset of the hot
+products, so concurrent reservations overlap on the same rows in different orders.
+
+Afterwards it checks that no stock went negative, that every request was either
+accepted (201) or refused for stock (409) - a deadlock or any other error fails
+the run - and that, per product, the stock taken is exactly what the accepted
+orders recorded as reserved. Everything it inserted is removed again.
+
+Run from the repository root against a disposable database migrated to head:
+
+    python -m benchmarks.stock_contention --products 3 --stock 100 --orders 500 --concurrency 32
+"""
+from collections import Counter
+from decimal import Decimal
+import argparse
+import asyncio
+import random
+import time
+import uuid
+import httpx
+from sqlalchemy import select, delete, func
+from app.database import SessionLocal
+from app.enums import Role, AccountStatus
+from app.main import app
+from app.models import User, Session, Category, Product, Order, OrderItem
+from app.oauth2 import get_current_user, get_current_user_async
+from app.salesSummary import record_orders
+from app.schemas import UserPrincipal
+
+
+def seed(db, products: int, stock: Decimal):
+    tag = uuid.uuid4().hex[:8]
+    user = User(first_name="Stock", last_name="Contention", email=f"sc-{tag}@example.com", password="x", role=Role.Admin, status=AccountStatus.Active)
+    db.add(user)
+    db.flush()
+    session = Session(user_id=user.id)
+    category = Category(name=f"sc-{tag}", description="", user_id=user.id)
+    db.add_all([session, category])
+    db.flush()
+    hot = [Product(name=f"sc-{tag}-{i}", unit_price=Decimal("1.00"), category_id=category.id, stock=stock) for i in range(products)]
+    db.add_all(hot)
+    db.commit()
+    return user, session, category, [product.id for product in hot]
+
+
+def cleanup(db, user, session, category, product_ids):
+    order_ids = db.scalars(select(Order.id).where(Order.session_id == session.id)).all()
+    record_orders(db, order_ids, -1)
+    db.execute(delete(OrderItem).where(OrderItem.order_id.in_(order_ids)))
+    db.execute(delete(Order).where(Order.id.in_(order_ids)))
+    db.execute(delete(Product).where(Product.id.in_(product_ids)))
+    db.execute(delete(Category).where(Category.id == category.id))
+    db.execute(delete(Session).where(Session.id == session.id))
+    db.execute(delete(User).where(User.id == user.id))
+    db.commit()
+
+
+async def fire(buyer_id: int, product_ids, orders: int, concurrency: int, quantity: Decimal) -> Counter:
+    statuses = Counter()
+    gate = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async def order(client):
+        items = random.sample(product_ids, random.randint(1, len(product_ids)))
+        body = {
+            "buyer_id": buyer_id,
+            "buyer_phone": 1,
+            "buyer_address": "contention",
+            "items": [{"product_id": product_id, "quantity": str(quantity), "unit_price": "1.00"} for product_id in items],
+        }
+        async with gate:
+            response = await client.post("/orders/", json=body)
+        statuses[response.json().get("status")] += 1
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        await asyncio.gather(*(order(client) for _ in range(orders)))
+    return statuses
+
+
+def run(products: int, stock: Decimal, orders: int, concurrency: int, quantity: Decimal):
+    db = SessionLocal()
+    user, session, category, product_ids = seed(db, products, stock)
+    principal = UserPrincipal(id=user.id, role=user.role, status=user.status)
+    app.dependency_overrides[get_current_user] = lambda: principal
+    app.dependency_overrides[get_current_user_async] = lambda: principal
+    try:
+        started = time.perf_counter()
+        statuses = asyncio.run(fire(user.id, product_ids, orders, concurrency, quantity))
+        elapsed = time.perf_counter() - started
+
+        db.expire_all()
+        remaining = dict(db.execute(select(Product.id, Product.stock).where(Product.id.in_(product_ids))).all())
+        ordered = dict(db.execute(
+            select(OrderItem.product_id, func.sum(OrderItem.reserved_quantity))
+            .join(Order, Order.id == OrderItem.order_id)
+            .where(Order.session_id == session.id)
+            .group_by(OrderItem.product_id)
+        ).all())
+
+        print(f"{orders} orders, {concurrency} concurrent, {products} products x {stock} units: {orders / elapsed:.1f} orders/s")
+        print(f"statuses: {dict(statuses)}")
+        print(f"{'product':>8} {'remaining':>10} {'ordered':>10}")
+        for product_id in product_ids:
+            print(f"{product_id:>8} {remaining[product_id]:>10} {ordered.get(product_id, 0):>10}")
+
+        assert set(statuses) <= {201, 409}, f"unexpected statuses: {dict(statuses)}"
+        assert statuses[201] == db.scalar(select(func.count(Order.id)).where(Order.session_id == session.id))
+        for product_id in product_ids:
+            assert remaining[product_id] >= 0, f"product {product_id} went negative: {remaining[product_id]}"
+            assert stock - remaining[product_id] == ordered.get(product_id, 0), f"product {product_id}: reserved {stock - remaining[product_id]}, ordered {ordered.get(product_id, 0)}"
+    finally:
+        app.dependency_overrides.clear()
+        cleanup(db, user, session, category, product_ids)
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=3)
+    parser.add_argument("--stock", type=Decimal, default=Decimal(100))
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--quantity", type=Decimal, default=Decimal(1))
+    args = parser.parse_args()
+    run(args.products, args.stock, args.orders, args.concurrency, args.quantity)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# These tests talk to the PostgreSQL database configured through the usual settings
+# (.env / DATABASE_* variables), migrated to head. Point them at a disposable database:
+# the fixtures insert rows and delete them again afterwards.
+import pytest
+
+collect_ignore_glob = []
+try:
+    import fastapi, httpx
+    from app.config import settings
+except Exception:
+    # runtime dependencies or settings missing: nothing here can run
+    collect_ignore_glob = ["test_*.py"]
+else:
+    # app.main first: importing app.oauth2 (or a router) on its own runs into a circular import
+    from app import main
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def app():
+    try:
+        from app.main import app
+        from app.database import engine
+        with engine.connect():
+            pass
+    except Exception as e:
+        pytest.skip(f"database not available: {e}")
+    return app
+
+
+@pytest.fixture
+async def client(app):
+    from app.database import async_engine
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            yield client
+    finally:
+        # each test runs on its own event loop: pooled asyncpg connections must not outlive it
+        await async_engine.dispose()
@@ -0,0 +1,86 @@
+from decimal import Decimal
+from contextlib import contextmanager
+import uuid
+import pytest
+from sqlalchemy import event, delete
+from app.database import SessionLocal, engine, async_engine
+from app.enums import Role, AccountStatus
+from app.models import User, Session, Category, Product, Order, OrderItem
+from app.oauth2 import get_current_user, get_current_user_async
+from app.schemas import UserPrincipal
+from app.httpCache import response_cache
+
+ROWS = 25
+
+
+@pytest.fixture
+def seeded(app):
+    db = SessionLocal()
+    tag = uuid.uuid4().hex[:8]
+    user = User(first_name="Query", last_name="Count", email=f"qc-{tag}@example.com", password="x", role=Role.Admin, status=AccountStatus.Active)
+    db.add(user)
+    db.flush()
+    session = Session(user_id=user.id)
+    categories = [Category(name=f"qc-{tag}-{i}", description="", user_id=user.id) for i in range(ROWS)]
+    db.add(session)
+    db.add_all(categories)
+    db.flush()
+    products = [Product(name=f"qc-{tag}-{i}", unit_price=Decimal("1.50"), category_id=categories[i % 3].id) for i in range(ROWS)]
+    db.add_all(products)
+    db.flush()
+    orders = [Order(buyer_id=user.id, buyer_phone=1, buyer_address="x", session_id=session.id) for _ in range(ROWS)]
+    db.add_all(orders)
+    db.flush()
+    db.add_all([
+        OrderItem(order_id=order.id, product_id=products[(i + j) % ROWS].id, quantity=Decimal(1), unit_price=Decimal("1.50"))
+        for i, order in enumerate(orders) for j in range(2)
+    ])
+    db.commit()
+
+    principal = UserPrincipal(id=user.id, role=user.role, status=user.status)
+    app.dependency_overrides[get_current_user] = lambda: principal
+    app.dependency_overrides[get_current_user_async] = lambda: principal
+    response_cache.clear()
+    try:
+        yield
+    finally:
+        app.dependency_overrides.clear()
+        order_ids = [o.id for o in orders]
+        db.execute(delete(OrderItem).where(OrderItem.order_id.in_(order_ids)))
+        db.execute(delete(Order).where(Order.id.in_(order_ids)))
+        db.execute(delete(Product).where(Product.id.in_([p.id for p in products])))
+        db.execute(delete(Category).where(Category.id.in_([c.id for c in categories])))
+        db.execute(delete(Session).where(Session.id == session.id))
+        db.execute(delete(User).where(User.id == user.id))
+        db.commit()
+        db.close()
+
+
+@contextmanager
+def count_statements():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    targets = [engine, async_engine.sync_engine]
+    for target in targets:
+        event.listen(target, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        for target in targets:
+            event.remove(target, "before_cursor_execute", record)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("path", ["/orders/", "/products/", "/categories/"])
+async def test_list_query_count_does_not_grow_with_page_size(client, seeded, path):
+    counts = {}
+    for page_size in (2, ROWS):
+        with count_statements() as statements:
+            response = await client.get(path, params={"page_size": page_size, "include_total": False})
+        assert response.status_code == 200
+        assert len(response.json()["data"]) == page_size
+        counts[page_size] = len(statements)
+    assert counts[2] == counts[ROWS]
@@ -0,0 +1,4 @@
+def test_app_imports():
+    # catches errors raised while the app, its routers and models are being defined
+    from app.main import app
+    assert app.routes